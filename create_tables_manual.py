@@ -85,7 +85,7 @@ def create_tables_manually():
                 user_id VARCHAR(36) NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (meeting_id) REFERENCES meetings(id),
+                FOREIGN KEY (meeting_id) REFERENCES meetings(id) ON DELETE CASCADE,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
@@ -0,0 +1,127 @@
+"""
+Shared PostgreSQL connection pool
+Used by the raw-SQL blueprints and by code that runs outside a Flask request
+(WebSocket server, background workers)
+"""
+
+import os
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+import psycopg2.pool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+PG_POOL_MAX = int(os.getenv('PG_POOL_MAX', '16'))
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection handed out by the pool.
+
+    Being a Python subclass it accepts attributes, so callers can record
+    per-connection setup (such as prepared statements) on it.
+    """
+
+# Created on first use so importing this module never needs a reachable database
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _close_pool():
+    """Close every pooled connection at interpreter exit"""
+    if _POOL is not None and not _POOL.closed:
+        _POOL.closeall()
+
+def get_db_connection():
+    """Get database connection from pool"""
+    global _POOL
+    try:
+        if _POOL is None:
+            with _POOL_LOCK:
+                if _POOL is None:
+                    _POOL = psycopg2.pool.ThreadedConnectionPool(
+                        minconn=2,
+                        maxconn=PG_POOL_MAX,
+                        dsn=DATABASE_URL,
+                        connection_factory=PooledConnection
+                    )
+                    atexit.register(_close_pool)
+        return _POOL.getconn()
+    except Exception as e:
+        logging.error(f"Database connection error: {e}")
+        return None
+
+def put_db_connection(conn):
+    """Return database connection to pool"""
+    if conn is None:
+        return
+    try:
+        _POOL.putconn(conn)
+    except Exception as e:
+        logging.error(f"Error returning connection to pool: {e}")
+        conn.close()
+
+@contextmanager
+def db_conn():
+    """Check a pooled connection out for the duration of a with block.
+
+    Yields None if no connection could be obtained.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        if conn:
+            put_db_connection(conn)
+
+def execute_prepared(cursor, name, sql, params):
+    """Run sql (written with $1, $2 ... placeholders) as a named prepared statement.
+
+    The statement is PREPAREd the first time a pooled connection sees it, so
+    later executions skip parse and plan. Falls back to the plain statement if
+    the server (or a transaction-mode pooler in front of it) has lost the
+    statement or already holds one under that name. Inside a transaction the
+    attempt runs under a savepoint, so the fallback never discards the
+    caller's earlier statements.
+    """
+    conn = cursor.connection
+    prepared = getattr(conn, 'prepared_statements', None)
+    savepoint = (
+        not conn.autocommit
+        and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    )
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT execute_prepared")
+        if prepared is None:
+            # Statements survive a rollback, so start from what the server has
+            with conn.cursor() as lookup:
+                lookup.execute("SELECT name FROM pg_prepared_statements")
+                prepared = {row[0] for row in lookup.fetchall()}
+            conn.prepared_statements = prepared
+        if name not in prepared:
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+        placeholders = ', '.join(['%s'] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+        if savepoint:
+            # Separate cursor, so the EXECUTE results stay fetchable
+            with conn.cursor() as release:
+                release.execute("RELEASE SAVEPOINT execute_prepared")
+    except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement):
+        if savepoint:
+            with conn.cursor() as rollback:
+                rollback.execute(
+                    "ROLLBACK TO SAVEPOINT execute_prepared; RELEASE SAVEPOINT execute_prepared"
+                )
+        else:
+            conn.rollback()
+        conn.prepared_statements = None
+        for index in range(len(params), 0, -1):
+            sql = sql.replace(f'${index}', '%s')
+        cursor.execute(sql, params)
@@ -36,7 +36,7 @@ def fix_tasks_table():
                 user_id VARCHAR(36) NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (meeting_id) REFERENCES meetings(id),
+                FOREIGN KEY (meeting_id) REFERENCES meetings(id) ON DELETE CASCADE,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
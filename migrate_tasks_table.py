@@ -13,21 +13,45 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MIGRATION_INDEXES = [
+    # Per-meeting category counts (extraction status, meeting listings)
+    ('idx_tasks_meeting_category',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_meeting_category ON tasks(meeting_id, category)"),
+    # Per-meeting status counts
+    ('idx_tasks_meeting_status',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_meeting_status ON tasks(meeting_id, status)"),
+    # A user's open tasks by deadline (overdue and upcoming notifications)
+    ('idx_tasks_user_open_deadline',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_user_open_deadline ON tasks(user_id, deadline) "
+     "WHERE status::text NOT IN ('completed', 'COMPLETED')"),
+    # A user's meetings newest first (OFFSET and keyset pagination), covering
+    # the listing columns for index-only scans
+    ('idx_meetings_user_listing',
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_meetings_user_listing ON meetings(user_id, created_at DESC, id DESC) "
+     "INCLUDE (title, file_name, file_size, duration, participants, status, updated_at)"),
+    # Superseded by idx_meetings_user_listing
+    ('idx_meetings_user_created (dropped)',
+     "DROP INDEX CONCURRENTLY IF EXISTS idx_meetings_user_created"),
+]
+
 def migrate_tasks_table():
     """Add enhanced fields to tasks table"""
     try:
-        conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+        conn = psycopg2.connect(os.getenv('DATABASE_URL'), application_name='meetingai-migrate')
         cursor = conn.cursor()
         
         logger.info("🔧 Migrating tasks table to include enhanced fields...")
         
-        # Check if enhanced columns already exist
+        # Check which enhanced columns already exist (tasks and meetings in one query)
         cursor.execute("""
-            SELECT column_name 
+            SELECT table_name, column_name 
             FROM information_schema.columns 
-            WHERE table_name = 'tasks' AND column_name IN ('effort', 'dependencies', 'tags', 'context')
+            WHERE (table_name = 'tasks' AND column_name IN ('effort', 'dependencies', 'tags', 'context'))
+               OR (table_name = 'meetings' AND column_name = 'timeline')
         """)
-        existing_columns = [row[0] for row in cursor.fetchall()]
+        found_columns = cursor.fetchall()
+        existing_columns = [col for table, col in found_columns if table == 'tasks']
+        timeline_exists = any(table == 'meetings' for table, col in found_columns)
         
         # Add missing columns
         if 'effort' not in existing_columns:
@@ -47,19 +71,39 @@ def migrate_tasks_table():
             logger.info("✅ Added 'context' column")
         
         # Add timeline column to meetings table if it doesn't exist
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'meetings' AND column_name = 'timeline'
-        """)
-        timeline_exists = cursor.fetchone()
-        
         if not timeline_exists:
             cursor.execute("ALTER TABLE meetings ADD COLUMN timeline TEXT")
             logger.info("✅ Added 'timeline' column to meetings table")
         
+        # Deleting a meeting removes its tasks server-side. Swap out any
+        # tasks -> meetings foreign key that doesn't cascade yet.
+        cursor.execute("""
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = 'tasks'::regclass
+              AND confrelid = 'meetings'::regclass
+              AND contype = 'f'
+              AND confdeltype <> 'c'
+        """)
+        stale_fkeys = [row[0] for row in cursor.fetchall()]
+        if stale_fkeys:
+            for conname in stale_fkeys:
+                cursor.execute(f'ALTER TABLE tasks DROP CONSTRAINT "{conname}"')
+            cursor.execute("""
+                ALTER TABLE tasks ADD CONSTRAINT tasks_meeting_id_fkey
+                FOREIGN KEY (meeting_id) REFERENCES meetings(id) ON DELETE CASCADE
+            """)
+            logger.info("✅ tasks.meeting_id now cascades on meeting delete")
+        
         # Commit changes
         conn.commit()
+        
+        # Indexes are built CONCURRENTLY so live tables stay writable; that
+        # cannot run inside a transaction block
+        conn.autocommit = True
+        for index_name, index_sql in MIGRATION_INDEXES:
+            cursor.execute(index_sql)
+            logger.info(f"✅ Ensured '{index_name}' index")
+        conn.autocommit = False
         logger.info("✅ Migration completed successfully")
         
         # Verify the changes
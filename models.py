@@ -47,6 +47,13 @@ class User(db.Model):
 
 class Meeting(db.Model):
     __tablename__ = 'meetings'
+    __table_args__ = (
+        # A user's meetings newest first (OFFSET and keyset pagination); carries
+        # the listing columns so pages are served by an index-only scan
+        db.Index('idx_meetings_user_listing', 'user_id', db.text('created_at DESC'), db.text('id DESC'),
+                 postgresql_include=['title', 'file_name', 'file_size', 'duration',
+                                     'participants', 'status', 'updated_at']),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = db.Column(db.String(200), nullable=False)
@@ -68,7 +75,8 @@ class Meeting(db.Model):
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     
     # Relationships
-    tasks = db.relationship('Task', backref='meeting', lazy=True, cascade='all, delete-orphan')
+    # The database removes a meeting's tasks itself (ON DELETE CASCADE)
+    tasks = db.relationship('Task', backref='meeting', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
     def to_dict(self):
         return {
@@ -93,6 +101,16 @@ class Meeting(db.Model):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Per-meeting counts by category and by status
+        db.Index('idx_tasks_meeting_category', 'meeting_id', 'category'),
+        db.Index('idx_tasks_meeting_status', 'meeting_id', 'status'),
+        # A user's open tasks by deadline (overdue and upcoming notifications).
+        # Compared as text: ORM-created tables hold the enum names (COMPLETED),
+        # raw-SQL ones the values (completed).
+        db.Index('idx_tasks_user_open_deadline', 'user_id', 'deadline',
+                 postgresql_where=db.text("status::text NOT IN ('completed', 'COMPLETED')")),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(500), nullable=False)
@@ -107,7 +125,7 @@ class Task(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign keys
-    meeting_id = db.Column(db.String(36), db.ForeignKey('meetings.id'), nullable=False)
+    meeting_id = db.Column(db.String(36), db.ForeignKey('meetings.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     
     def to_dict(self):
@@ -4,16 +4,64 @@ Populate database with sample data for testing
 """
 
 import os
+import sys
+import random
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import uuid
 
 load_dotenv()
 
-def populate_database():
+SAMPLE_USER_ID = 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
+
+# Default number of sample tasks to generate; pass a larger count on the
+# command line (python populate_database.py 100000) for load-testing fixtures
+SAMPLE_TASK_COUNT = 11
+
+OWNER_POOL = (
+    'John Doe', 'Sarah Wilson', 'Mike Johnson', 'Alex Chen', 'Emma Davis', 'David Brown',
+    'Lisa Wang', 'Tom Wilson', 'Rachel Green', 'Mark Taylor', 'Anna Smith'
+)
+
+TASK_POOL = (
+    ('Complete frontend development', 'Finish the remaining frontend components and ensure all features are working properly'),
+    ('Test backend API endpoints', 'Run comprehensive tests on all backend API endpoints to ensure they work correctly'),
+    ('Optimize database queries', 'Review and optimize database queries for better performance'),
+    ('Implement user authentication', 'Set up Firebase authentication and integrate with the application'),
+    ('Build dashboard features', 'Create the main dashboard with task overview, statistics, and user interface'),
+    ('Add file upload functionality', 'Implement file upload feature for meeting recordings and documents'),
+    ('Implement mobile responsiveness', 'Make the application fully responsive for mobile devices'),
+    ('Add dark mode feature', 'Implement dark mode toggle and theme switching functionality'),
+    ('Develop advanced analytics', 'Create advanced analytics dashboard with charts and insights'),
+    ('Update project documentation', 'Update all project documentation with latest changes'),
+    ('Code review for authentication module', 'Conduct thorough code review for the authentication module')
+)
+
+STATUS_POOL = ('pending', 'pending', 'pending', 'in_progress', 'completed')
+PRIORITY_POOL = ('high', 'medium', 'low')
+
+def generate_sample_tasks(meeting_ids, count, seed=42):
+    """Generate task row tuples ready for execute_values"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = []
+    for i in range(count):
+        name, description = TASK_POOL[i % len(TASK_POOL)]
+        status = rng.choice(STATUS_POOL)
+        deadline = now + timedelta(days=rng.randint(-5, 30))
+        completed_at = now - timedelta(hours=rng.randint(1, 48)) if status == 'completed' else None
+        rows.append((
+            str(uuid.uuid4()), name, description, rng.choice(OWNER_POOL), status,
+            rng.choice(PRIORITY_POOL), 'action-item', deadline, completed_at,
+            meeting_ids[i % len(meeting_ids)], SAMPLE_USER_ID
+        ))
+    return rows
+
+def populate_database(task_count=SAMPLE_TASK_COUNT):
     try:
-        conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+        conn = psycopg2.connect(os.getenv('DATABASE_URL'), application_name='meetingai-populate')
         cursor = conn.cursor()
         
         print("🚀 Populating database with sample data...")
@@ -88,173 +136,26 @@ def populate_database():
         print(f"✅ Created {len(meetings_data)} sample meetings")
         
         # Create sample tasks based on the meetings
-        tasks_data = [
-            # Tasks from Weekly Team Standup
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Complete frontend development',
-                'description': 'Finish the remaining 20% of frontend components and ensure all features are working properly',
-                'owner': 'John Doe',
-                'status': 'in_progress',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=3),
-                'meeting_id': meetings_data[0]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Test backend API endpoints',
-                'description': 'Run comprehensive tests on all backend API endpoints to ensure they work correctly',
-                'owner': 'Sarah Wilson',
-                'status': 'pending',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=2),
-                'meeting_id': meetings_data[0]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Optimize database queries',
-                'description': 'Review and optimize database queries for better performance',
-                'owner': 'Mike Johnson',
-                'status': 'pending',
-                'priority': 'medium',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=5),
-                'meeting_id': meetings_data[0]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            
-            # Tasks from Project Planning Meeting
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Implement user authentication',
-                'description': 'Set up Firebase authentication and integrate with the application',
-                'owner': 'Alex Chen',
-                'status': 'completed',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() - timedelta(days=1),
-                'completed_at': datetime.now() - timedelta(hours=2),
-                'meeting_id': meetings_data[1]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Build dashboard features',
-                'description': 'Create the main dashboard with task overview, statistics, and user interface',
-                'owner': 'Emma Davis',
-                'status': 'in_progress',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=7),
-                'meeting_id': meetings_data[1]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Add file upload functionality',
-                'description': 'Implement file upload feature for meeting recordings and documents',
-                'owner': 'David Brown',
-                'status': 'pending',
-                'priority': 'medium',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=10),
-                'meeting_id': meetings_data[1]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            
-            # Tasks from Client Review Session
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Implement mobile responsiveness',
-                'description': 'Make the application fully responsive for mobile devices',
-                'owner': 'Lisa Wang',
-                'status': 'pending',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=14),
-                'meeting_id': meetings_data[2]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Add dark mode feature',
-                'description': 'Implement dark mode toggle and theme switching functionality',
-                'owner': 'Tom Wilson',
-                'status': 'pending',
-                'priority': 'medium',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=21),
-                'meeting_id': meetings_data[2]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Develop advanced analytics',
-                'description': 'Create advanced analytics dashboard with charts and insights',
-                'owner': 'Rachel Green',
-                'status': 'pending',
-                'priority': 'low',
-                'category': 'action-item',
-                'deadline': datetime.now() + timedelta(days=30),
-                'meeting_id': meetings_data[2]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            
-            # Some overdue tasks
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Update project documentation',
-                'description': 'Update all project documentation with latest changes',
-                'owner': 'Mark Taylor',
-                'status': 'pending',
-                'priority': 'medium',
-                'category': 'action-item',
-                'deadline': datetime.now() - timedelta(days=2),
-                'meeting_id': meetings_data[0]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            },
-            {
-                'id': str(uuid.uuid4()),
-                'name': 'Code review for authentication module',
-                'description': 'Conduct thorough code review for the authentication module',
-                'owner': 'Anna Smith',
-                'status': 'pending',
-                'priority': 'high',
-                'category': 'action-item',
-                'deadline': datetime.now() - timedelta(days=1),
-                'meeting_id': meetings_data[1]['id'],
-                'user_id': 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
-            }
-        ]
+        tasks_data = generate_sample_tasks([m['id'] for m in meetings_data], task_count)
         
-        for task in tasks_data:
-            cursor.execute("""
-                INSERT INTO tasks (id, name, description, owner, status, priority, category, deadline, completed_at, meeting_id, user_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                task['id'], task['name'], task['description'], task['owner'], task['status'],
-                task['priority'], task['category'], task['deadline'], task.get('completed_at'),
-                task['meeting_id'], task['user_id']
-            ))
+        execute_values(cursor, """
+            INSERT INTO tasks (id, name, description, owner, status, priority, category, deadline, completed_at, meeting_id, user_id)
+            VALUES %s
+        """, tasks_data, page_size=1000)
         
         print(f"✅ Created {len(tasks_data)} sample tasks")
         
         # Commit all changes
         conn.commit()
         
-        # Verify data
-        cursor.execute("SELECT COUNT(*) FROM users")
-        user_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM meetings")
-        meeting_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM tasks")
-        task_count = cursor.fetchone()[0]
+        # Verify data (single round trip for all three counts)
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM users),
+                (SELECT COUNT(*) FROM meetings),
+                (SELECT COUNT(*) FROM tasks)
+        """)
+        user_count, meeting_count, task_count = cursor.fetchone()
         
         print(f"📊 Database populated successfully:")
         print(f"   - Users: {user_count}")
@@ -265,10 +166,10 @@ def populate_database():
         cursor.execute("""
             SELECT 
                 COUNT(*) as total,
-                COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending,
-                COUNT(CASE WHEN status = 'in_progress' THEN 1 END) as in_progress,
-                COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed,
-                COUNT(CASE WHEN deadline < NOW() AND status != 'completed' THEN 1 END) as overdue
+                COUNT(*) FILTER (WHERE status = 'pending') as pending,
+                COUNT(*) FILTER (WHERE status = 'in_progress') as in_progress,
+                COUNT(*) FILTER (WHERE status = 'completed') as completed,
+                COUNT(*) FILTER (WHERE deadline < NOW() AND status != 'completed') as overdue
             FROM tasks WHERE user_id = 'mJ5ODQaCxscD2EaFNOBWst9XJMg1'
         """)
         stats = cursor.fetchone()
@@ -291,4 +192,4 @@ def populate_database():
         return False
 
 if __name__ == '__main__':
-    populate_database()
+    populate_database(int(sys.argv[1]) if len(sys.argv) > 1 else SAMPLE_TASK_COUNT)
@@ -18,16 +18,15 @@ logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
 def run_command(command, description):
-    """Run a command and handle errors"""
+    """Run a command (argv list) and handle errors"""
     logger.info(f"🔄 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        # Discard stdout (pip output can run to megabytes); keep stderr for failures
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
         logger.info(f"✅ {description} completed")
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"❌ {description} failed: {e}")
-        if e.stdout:
-            logger.error(f"STDOUT: {e.stdout}")
         if e.stderr:
             logger.error(f"STDERR: {e.stderr}")
         return False
@@ -65,7 +64,7 @@ def install_dependencies():
     for req_file in requirements_files:
         if os.path.exists(req_file):
             logger.info(f"📋 Found {req_file}")
-            if run_command(f"pip install -r {req_file}", f"Installing {req_file}"):
+            if run_command([sys.executable, '-m', 'pip', 'install', '-r', req_file], f"Installing {req_file}"):
                 return True
     
     logger.error("❌ No requirements file found")
@@ -75,11 +74,11 @@ def setup_database():
     """Set up database tables"""
     logger.info("🗄️ Setting up database...")
     
-    if run_command("python setup_database.py", "Database setup"):
+    if run_command([sys.executable, 'setup_database.py'], "Database setup"):
         return True
     else:
         logger.warning("⚠️ Database setup failed, trying manual setup...")
-        return run_command("python check_database.py", "Database check")
+        return run_command([sys.executable, 'check_database.py'], "Database check")
 
 def main():
     """Main setup function"""
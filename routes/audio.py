@@ -2,89 +2,359 @@ from flask import Blueprint, request, jsonify
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import logging
 import base64
-import json
+import binascii
+import orjson
 import asyncio
 import websockets
 import threading
+import socket
+import struct
+import time
+import tempfile
+import io
+import csv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional
 import os
 from dotenv import load_dotenv
-import requests
-import uuid
+import aiohttp
+from weakref import WeakValueDictionary
+from psycopg2.extras import execute_values
+from database import db_conn, execute_prepared
+
+try:
+    # Faster event loop for the WebSocket server; not available on Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 load_dotenv()
 
+# Read once at import; these do not change while the process runs
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
+RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST', 'speech-to-text-ai.p.rapidapi.com')
+
 audio_bp = Blueprint('audio', __name__)
 
-# WebSocket connections storage
-websocket_connections = {}
+# WebSocket connections storage, keyed by client id. Weak values so a
+# dropped socket is never kept alive by this registry.
+websocket_connections = WeakValueDictionary()
+
+# Shared HTTP session for RapidAPI/Gemini calls, created on first use inside
+# the WebSocket event loop so TCP+TLS connections are kept alive across chunks
+_http_session = None
+_http_session_lock = asyncio.Lock()
+
+async def get_http_session():
+    """Get the shared aiohttp session, creating it on first use"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        return _http_session
+    async with _http_session_lock:
+        if _http_session is None or _http_session.closed:
+            _http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60)
+            )
+        return _http_session
+
+# AudioProcessorService holds only configuration and API clients, so one
+# instance is shared by every connection. It is created on first use so
+# importing this blueprint doesn't pull in the Gemini/Supabase SDKs.
+_audio_processor_service = None
+
+def get_audio_processor_service():
+    """Get the shared AudioProcessorService, creating it on first use"""
+    global _audio_processor_service
+    if _audio_processor_service is None:
+        from services.audio_processor import AudioProcessorService
+        _audio_processor_service = AudioProcessorService()
+    return _audio_processor_service
+
+def _uuid4_strs(count):
+    """Generate count random (version 4) UUID strings from one os.urandom call"""
+    raw = bytearray(os.urandom(16 * count))
+    ids = []
+    for offset in range(0, 16 * count, 16):
+        raw[offset + 6] = (raw[offset + 6] & 0x0F) | 0x40  # version 4
+        raw[offset + 8] = (raw[offset + 8] & 0x3F) | 0x80  # RFC 4122 variant
+        h = raw[offset:offset + 16].hex()
+        ids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return ids
+
+# Translate tables for clean_base64_data: identity mapping plus every byte
+# outside the base64 alphabet marked for deletion
+_B64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/='
+_B64_IDENT = bytes(range(256))
+_B64_DELETE = bytes(i for i in range(256) if i not in _B64_ALPHABET)
 
 def clean_base64_data(data):
-    """Clean base64 data by removing BOM and invalid characters"""
+    """Clean base64 data by removing BOM and invalid characters.
+    
+    Returns ASCII bytes, which base64.b64decode accepts directly.
+    """
     if not data:
         return data
     
-    # Remove BOM (Byte Order Mark) if present
-    if data.startswith('\ufeff'):
-        data = data[1:]
+    if isinstance(data, str):
+        # Non-ASCII characters (including a BOM) are never valid base64
+        data = data.encode('ascii', 'ignore')
     
-    # Remove any non-base64 characters
-    import re
-    data = re.sub(r'[^A-Za-z0-9+/=]', '', data)
+    # Remove any non-base64 characters (UTF-8 BOM bytes included) in one C-level pass
+    data = data.translate(_B64_IDENT, delete=_B64_DELETE)
     
     # Ensure proper padding
     missing_padding = len(data) % 4
     if missing_padding:
-        data += '=' * (4 - missing_padding)
+        data += b'=' * (4 - missing_padding)
     
     return data
 
-def get_db_connection():
-    """Get database connection"""
+def decode_base64_data(data):
+    """Decode base64 audio, cleaning the input only when it isn't already valid.
+    
+    Browser MediaRecorder output is almost always clean, so the common case
+    is a single strict decode pass with no cleanup.
+    """
+    if len(data) % 4 == 0:
+        try:
+            return base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            # BOM, whitespace or other stray characters: clean and retry
+            pass
+    return base64.b64decode(clean_base64_data(data), validate=True)
+
+def _decode_base64_audio(data):
+    """Decode a base64 audio payload, optionally wrapped in a data: URL.
+    
+    Shared by the streamed audio_chunk and full-file process_audio paths.
+    Returns None if the payload is missing, too short or not valid base64.
+    """
+    if not data or not isinstance(data, str):
+        logging.warning("Invalid audio data received")
+        return None
+    
+    if data.startswith('data:audio'):
+        data = data.partition(',')[2]
+    
+    data = data.strip()
+    if len(data) < 4:
+        logging.warning("Empty or too short audio data")
+        return None
+    
     try:
-        import psycopg2
-        from psycopg2.extras import RealDictCursor
-        DATABASE_URL = os.getenv('DATABASE_URL')
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    except Exception as e:
-        logging.error(f"Database connection error: {e}")
+        return decode_base64_data(data)
+    except Exception as decode_error:
+        logging.error(f"Base64 decode error: {decode_error}")
+        return None
+
+# Column order shared by the execute_values and COPY paths in store_insights
+TASK_INSERT_COLUMNS = "id, name, description, owner, category, priority, deadline, meeting_id, user_id, status, created_at, updated_at"
+
+# Above this many rows COPY beats a multi-row INSERT; below it the setup cost dominates
+COPY_THRESHOLD = 200
+
+def _rows_to_csv(rows):
+    """Serialize rows into an in-memory CSV buffer for COPY, writing None as \\N"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_MINIMAL)
+    writer.writerows(
+        ['\\N' if value is None else value for value in row] for row in rows
+    )
+    buf.seek(0)
+    return buf
+
+# Server-side prepared statements for the meeting lifecycle writes, created
+# once per pooled connection so later EXECUTEs skip parse and plan
+_MEETING_STATEMENTS = {
+    'ins_meeting': """
+        INSERT INTO meetings (id, title, user_id, status, created_at, updated_at)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    """,
+    'upd_meeting': """
+        UPDATE meetings 
+        SET status = 'completed', updated_at = $1
+        WHERE id = $2
+    """,
+}
+
+def _execute_meeting_statement(conn, name, params):
+    """EXECUTE a prepared meeting statement, preparing it on first use"""
+    with conn.cursor() as cursor:
+        execute_prepared(cursor, name, _MEETING_STATEMENTS[name], params)
+
+# Gemini prompt for post-transcription insight extraction
+INSIGHTS_PROMPT_TEMPLATE = """
+            Analyze this meeting transcript and extract:
+            1. Action items with owners and deadlines
+            2. Decisions made
+            3. Key discussion points
+            4. Next steps
+            
+            Transcript: {transcript}
+            
+            Return as JSON with this structure:
+            {{
+                "action_items": [
+                    {{"task": "string", "owner": "string", "deadline": "string", "priority": "high/medium/low"}}
+                ],
+                "decisions": ["string"],
+                "key_points": ["string"],
+                "next_steps": ["string"]
+            }}
+            """
+
+# Transcript characters sent to Gemini (~12k tokens at ~4 chars per token)
+INSIGHTS_MAX_CHARS = 48000
+
+GEMINI_GENERATE_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent'
+
+async def _call_gemini(api_key, prompt):
+    """POST a prompt to Gemini and return the reply text, or None on failure"""
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {api_key}'
+    }
+    
+    data = {
+        'contents': [{
+            'parts': [{'text': prompt}]
+        }]
+    }
+    
+    session = await get_http_session()
+    async with session.post(
+        GEMINI_GENERATE_URL,
+        headers=headers,
+        json=data,
+        timeout=aiohttp.ClientTimeout(total=30)
+    ) as response:
+        if response.status != 200:
+            logging.error(f"Gemini API error: {response.status}")
+            return None
+        result = await response.json(content_type=None, loads=orjson.loads)
+    
+    return result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '{}')
+
+async def request_insights(api_key, transcript):
+    """Ask Gemini for one transcript's insights and return the parsed dict, or None"""
+    text = await _call_gemini(api_key, INSIGHTS_PROMPT_TEMPLATE.format(transcript=transcript))
+    if not text:
         return None
+    insights = orjson.loads(text)
+    return insights if isinstance(insights, dict) else None
+
+# Task extraction normally runs post-transcription (see process_audio).
+# LIVE_INSIGHTS=1 also extracts during a live recording, in batches of new
+# transcript words; off by default since it multiplies Gemini calls and
+# stores insights from partial transcripts.
+LIVE_INSIGHTS = os.getenv('LIVE_INSIGHTS', '0') == '1'
+
+# Words of new transcript that trigger a live insights batch. The target adapts
+# to Gemini latency: doubled when calls are slow, halved when they are fast.
+INSIGHTS_MIN_WORDS = 50
+INSIGHTS_MAX_WORDS = 400
+INSIGHTS_SLOW_SECONDS = 3.0
+INSIGHTS_FAST_SECONDS = 1.0
+INSIGHTS_LATENCY_ALPHA = 0.3
+
+@dataclass
+class MeetingState:
+    """Transcript and insights bookkeeping for one meeting"""
+    # Transcript pieces are appended per chunk and joined on demand
+    transcript_parts: list = field(default_factory=list)
+    # Running word count, so the insights trigger never re-splits the transcript
+    word_count: int = 0
+    insights_word_mark: int = 0
+    insights_part_mark: int = 0
+    target_words: int = 100
+    insights_latency: Optional[float] = None
+    insights_task: Optional[asyncio.Task] = None
+    tasks: list = field(default_factory=list)
+    summary: str = ""
+    
+    @property
+    def transcript(self):
+        """Full transcript collected so far"""
+        return "".join(self.transcript_parts)
+    
+    def recent_transcript(self, max_chars):
+        """Last max_chars of the transcript, joining only the parts needed"""
+        total = 0
+        start = len(self.transcript_parts)
+        while start > 0 and total < max_chars:
+            start -= 1
+            total += len(self.transcript_parts[start])
+        return "".join(self.transcript_parts[start:])[-max_chars:]
 
 class AudioProcessor:
     def __init__(self):
-        self.rapidapi_key = os.getenv('RAPIDAPI_KEY')
-        self.rapidapi_host = 'speech-to-text-ai.p.rapidapi.com'
-        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
-        self.current_transcript = ""
-        self.meeting_tasks = []
-        self.meeting_summary = ""
-        
+        self.rapidapi_key = RAPIDAPI_KEY
+        self.rapidapi_host = RAPIDAPI_HOST
+        # Fixed per process, so build them once instead of on every chunk
+        self._rapidapi_url = f'https://{self.rapidapi_host}/transcribe'
+        self._rapidapi_headers = {
+            'x-rapidapi-key': self.rapidapi_key,
+            'x-rapidapi-host': self.rapidapi_host
+        }
+        self.gemini_api_key = GEMINI_API_KEY
+        self.live_insights = LIVE_INSIGHTS
+        # Per-meeting state, so meetings recorded over one connection never
+        # mix transcripts. Only touched from the event loop, so no lock.
+        self._states = {}
+    
+    def meeting_state(self, meeting_id):
+        """Get the state for a meeting, creating it on first use"""
+        state = self._states.get(meeting_id)
+        if state is None:
+            state = self._states[meeting_id] = MeetingState()
+        return state
+    
+    async def finish_meeting(self, user_id, meeting_id):
+        """Release a meeting's transcript, first extracting any words not yet covered by a live batch"""
+        state = self._states.pop(meeting_id, None)
+        if state is None or not self.live_insights:
+            return
+
+        if state.insights_task is not None:
+            # Let the running batch store its tasks before the final one
+            try:
+                await state.insights_task
+            except Exception as e:
+                logging.error(f"Error in pending insights batch: {e}")
+
+        if self.gemini_api_key and state.word_count > state.insights_word_mark:
+            transcript = "".join(state.transcript_parts[state.insights_part_mark:])
+            await self.extract_insights(user_id, meeting_id, transcript)
+
     async def process_audio_chunk(self, audio_data, user_id, meeting_id=None):
-        """Process audio chunk for transcription"""
+        """Process audio chunk for transcription.
+        
+        Accepts raw bytes (or a bytearray/memoryview) from a binary WebSocket
+        frame, or a base64 string from legacy JSON clients.
+        """
         try:
-            # Validate and clean audio data
-            if not audio_data or not isinstance(audio_data, str):
-                logging.warning("Invalid audio data received")
-                return None
-            
-            # Decode base64 audio data with proper error handling
-            if audio_data.startswith('data:audio'):
-                audio_data = audio_data.split(',')[1]
-            
-            # Clean the base64 data to remove BOM and invalid characters
-            audio_data = clean_base64_data(audio_data.strip())
-            
-            # Validate base64 data
-            if not audio_data or len(audio_data) < 4:
-                logging.warning("Empty or too short audio data")
-                return None
-            
-            try:
-                audio_bytes = base64.b64decode(audio_data, validate=True)
-            except Exception as decode_error:
-                logging.error(f"Base64 decode error: {decode_error}")
-                return None
+            if isinstance(audio_data, (bytes, bytearray, memoryview)):
+                # Binary frame: already raw audio, nothing to decode. Read-only
+                # buffers (bytes, or a view into a received frame) go to the
+                # multipart upload as-is; only mutable buffers are copied.
+                if isinstance(audio_data, bytes) or (isinstance(audio_data, memoryview) and audio_data.readonly):
+                    audio_bytes = audio_data
+                else:
+                    audio_bytes = bytes(audio_data)
+            else:
+                # Decode on the thread pool so large chunks don't stall the event loop
+                loop = asyncio.get_running_loop()
+                audio_bytes = await loop.run_in_executor(None, _decode_base64_audio, audio_data)
+                if audio_bytes is None:
+                    return None
             
             # Validate audio data size
             if len(audio_bytes) < 100:  # Minimum audio chunk size
@@ -95,11 +365,18 @@ class AudioProcessor:
             transcript = await self.transcribe_audio(audio_bytes)
             
             if transcript:
-                self.current_transcript += transcript + " "
+                # Normalise whitespace once per chunk, so the stored parts are
+                # already prompt-ready and never need re-splitting later
+                words = transcript.split()
+                state = self.meeting_state(meeting_id)
+                state.transcript_parts.append(" ".join(words))
+                state.transcript_parts.append(" ")
+                state.word_count += len(words)
                 
-                # Note: Task extraction moved to post-transcription phase using Gemini API
-                # This ensures Gemini is only used for timeline generation and task extraction
-                # not during the transcription process itself
+                # Note: Task extraction runs in the post-transcription phase
+                # unless live insights are enabled
+                if self.live_insights:
+                    self._maybe_extract_insights(state, user_id, meeting_id)
                 
                 return transcript
                 
@@ -107,6 +384,41 @@ class AudioProcessor:
             logging.error(f"Error processing audio chunk: {e}")
             return None
     
+    def _maybe_extract_insights(self, state, user_id, meeting_id):
+        """Start a background insights batch once enough new words have arrived"""
+        if not self.gemini_api_key:
+            return
+        if state.word_count - state.insights_word_mark < state.target_words:
+            return
+        if state.insights_task is not None and not state.insights_task.done():
+            # Previous batch still running; its words roll into the next one
+            return
+        
+        # Each batch covers only the words since the previous one, so the
+        # same action items are not stored twice
+        transcript = "".join(state.transcript_parts[state.insights_part_mark:])
+        state.insights_part_mark = len(state.transcript_parts)
+        state.insights_word_mark = state.word_count
+        state.insights_task = asyncio.create_task(
+            self._timed_extract_insights(state, user_id, meeting_id, transcript)
+        )
+    
+    async def _timed_extract_insights(self, state, user_id, meeting_id, transcript):
+        """Run extract_insights and adapt the meeting's batch size to its latency"""
+        started = time.monotonic()
+        await self.extract_insights(user_id, meeting_id, transcript)
+        elapsed = time.monotonic() - started
+        
+        if state.insights_latency is None:
+            state.insights_latency = elapsed
+        else:
+            state.insights_latency += INSIGHTS_LATENCY_ALPHA * (elapsed - state.insights_latency)
+        
+        if state.insights_latency > INSIGHTS_SLOW_SECONDS:
+            state.target_words = min(state.target_words * 2, INSIGHTS_MAX_WORDS)
+        elif state.insights_latency < INSIGHTS_FAST_SECONDS:
+            state.target_words = max(state.target_words // 2, INSIGHTS_MIN_WORDS)
+    
     async def transcribe_audio(self, audio_bytes):
         """Transcribe audio using RapidAPI"""
         try:
@@ -114,148 +426,117 @@ class AudioProcessor:
                 logging.warning("RapidAPI key not configured")
                 return "Transcription not available - API key missing"
             
-            # Prepare headers for RapidAPI
-            headers = {
-                'x-rapidapi-key': self.rapidapi_key,
-                'x-rapidapi-host': self.rapidapi_host
-            }
-            
-            # Prepare files for upload
-            files = {
-                'file': ('audio.webm', audio_bytes, 'audio/webm')
-            }
-            
-            # Make request to RapidAPI
-            response = requests.post(
-                f'https://{self.rapidapi_host}/transcribe',
-                headers=headers,
-                files=files,
-                timeout=30
-            )
+            # Prepare multipart form for upload; aiohttp writes the buffer
+            # straight to the socket without an intermediate copy
+            form = aiohttp.FormData()
+            form.add_field('file', audio_bytes, filename='audio.webm', content_type='audio/webm')
             
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    transcript = result.get('transcript', '')
-                    if transcript and isinstance(transcript, str):
-                        return transcript.strip()
-                    else:
-                        logging.warning("Empty or invalid transcript received")
+            # Make request to RapidAPI without blocking the event loop
+            session = await get_http_session()
+            async with session.post(
+                self._rapidapi_url,
+                headers=self._rapidapi_headers,
+                data=form,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 200:
+                    try:
+                        result = await response.json(content_type=None, loads=orjson.loads)
+                        transcript = result.get('transcript', '')
+                        if transcript and isinstance(transcript, str):
+                            return transcript.strip()
+                        else:
+                            logging.warning("Empty or invalid transcript received")
+                            return None
+                    except orjson.JSONDecodeError as json_error:
+                        logging.error(f"JSON decode error in transcription response: {json_error}")
                         return None
-                except json.JSONDecodeError as json_error:
-                    logging.error(f"JSON decode error in transcription response: {json_error}")
+                else:
+                    logging.error(f"Transcription API error: {response.status} - {await response.text()}")
                     return None
-            else:
-                logging.error(f"Transcription API error: {response.status_code} - {response.text}")
-                return None
                 
         except Exception as e:
             logging.error(f"Error in transcription: {e}")
             return None
     
-    async def extract_insights(self, user_id, meeting_id):
-        """Extract tasks and insights using Gemini API - POST-TRANSCRIPTION ONLY"""
+    async def extract_insights(self, user_id, meeting_id, transcript=None):
+        """Extract tasks and insights using Gemini API.
+        
+        Uses the given transcript batch, or the recent meeting transcript.
+        """
         try:
             if not self.gemini_api_key:
                 logging.error("Gemini API key not configured - task extraction requires Gemini")
                 return
             
-            # Prepare prompt for Gemini
-            prompt = f"""
-            Analyze this meeting transcript and extract:
-            1. Action items with owners and deadlines
-            2. Decisions made
-            3. Key discussion points
-            4. Next steps
-            
-            Transcript: {self.current_transcript}
-            
-            Return as JSON with this structure:
-            {{
-                "action_items": [
-                    {{"task": "string", "owner": "string", "deadline": "string", "priority": "high/medium/low"}}
-                ],
-                "decisions": ["string"],
-                "key_points": ["string"],
-                "next_steps": ["string"]
-            }}
-            """
-            
-            # Call Gemini API
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {self.gemini_api_key}'
-            }
-            
-            data = {
-                'contents': [{
-                    'parts': [{'text': prompt}]
-                }]
-            }
+            # Only the most recent part of a long meeting is sent; prompt
+            # size drives Gemini latency and cost
+            if transcript is None:
+                transcript = self.meeting_state(meeting_id).recent_transcript(INSIGHTS_MAX_CHARS)
+            else:
+                transcript = transcript[-INSIGHTS_MAX_CHARS:]
+            # Whitespace was already collapsed as each chunk was stored
             
-            response = requests.post(
-                'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            insights = await request_insights(self.gemini_api_key, transcript)
+            if insights is None:
+                return
             
-            if response.status_code == 200:
-                result = response.json()
-                insights = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '{}')
-                
-                # Parse and store insights
-                await self.store_insights(user_id, meeting_id, insights)
+            # Store insights
+            await self.store_insights(user_id, meeting_id, insights)
                 
         except Exception as e:
             logging.error(f"Error extracting insights: {e}")
     
-    async def store_insights(self, user_id, meeting_id, insights_json):
-        """Store extracted insights in database"""
+    async def store_insights(self, user_id, meeting_id, insights):
+        """Store extracted insights (parsed Gemini JSON) in database"""
         try:
-            conn = get_db_connection()
-            if not conn:
-                return
-            
-            try:
-                insights = json.loads(insights_json)
+            with db_conn() as conn:
+                if not conn:
+                    return
                 
-                with conn.cursor() as cursor:
-                    # Store action items as tasks
-                    for item in insights.get('action_items', []):
-                        task_id = str(uuid.uuid4())
-                        cursor.execute("""
-                            INSERT INTO tasks (id, name, description, owner, category, priority, deadline, meeting_id, user_id, status, created_at, updated_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            task_id,
-                            item.get('task', ''),
-                            f"Extracted from meeting: {item.get('task', '')}",
-                            item.get('owner', ''),
-                            'action-item',
-                            item.get('priority', 'medium'),
-                            item.get('deadline'),
-                            meeting_id or str(uuid.uuid4()),
-                            user_id,
-                            'pending',
-                            datetime.now(),
-                            datetime.now()
-                        ))
-                    
-                    conn.commit()
-                    logging.info(f"Stored {len(insights.get('action_items', []))} tasks for user {user_id}")
+                try:
+                    action_items = insights.get('action_items', [])
+                    now = datetime.now()
+                    # One urandom call for every id this batch needs
+                    ids = iter(_uuid4_strs(len(action_items) * (1 if meeting_id else 2)))
+                    rows = [(
+                        next(ids),
+                        item.get('task', ''),
+                        f"Extracted from meeting: {item.get('task', '')}",
+                        item.get('owner', ''),
+                        'action-item',
+                        item.get('priority', 'medium'),
+                        item.get('deadline'),
+                        meeting_id or next(ids),
+                        user_id,
+                        'pending',
+                        now,
+                        now
+                    ) for item in action_items]
                     
-            except Exception as e:
-                logging.error(f"Database error storing insights: {e}")
-            finally:
-                conn.close()
+                    with conn.cursor() as cursor:
+                        if len(rows) > COPY_THRESHOLD:
+                            # Large batches stream through COPY, skipping per-row parsing
+                            cursor.copy_expert(
+                                f"COPY tasks ({TASK_INSERT_COLUMNS}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                                _rows_to_csv(rows)
+                            )
+                        else:
+                            # Store action items as tasks in a single round trip
+                            execute_values(cursor, f"""
+                                INSERT INTO tasks ({TASK_INSERT_COLUMNS})
+                                VALUES %s
+                            """, rows, page_size=500)
+                        
+                        conn.commit()
+                        logging.info(f"Stored {len(rows)} tasks for user {user_id}")
                 
+                except Exception as e:
+                    logging.error(f"Database error storing insights: {e}")
+        
         except Exception as e:
             logging.error(f"Error storing insights: {e}")
 
-# Global audio processor instance
-audio_processor = AudioProcessor()
-
 @audio_bp.route('/audio/websocket', methods=['GET'])
 def websocket_endpoint():
     """WebSocket endpoint for audio streaming"""
@@ -264,17 +545,136 @@ def websocket_endpoint():
         'status': 'ready'
     })
 
+def _split_audio_frame(frame):
+    """Split a binary audio frame into (metadata, audio).
+    
+    Frames may start with a little-endian uint32 length followed by that
+    many bytes of JSON metadata, e.g. {"userId": ..., "meetingId": ...}.
+    Frames without a valid header are raw audio and return (None, frame).
+    """
+    if len(frame) > 5:
+        (meta_len,) = struct.unpack_from('<I', frame)
+        if 0 < meta_len <= len(frame) - 4 and frame[4] == 0x7B:  # '{'
+            view = memoryview(frame)
+            try:
+                meta = orjson.loads(view[4:4 + meta_len])
+            except orjson.JSONDecodeError:
+                return None, frame
+            if isinstance(meta, dict):
+                return meta, view[4 + meta_len:]
+    return None, frame
+
+def _insert_meeting(meeting_id, user_id, title, now):
+    """Create the meeting row for a live recording (runs on the thread pool)"""
+    with db_conn() as conn:
+        if not conn:
+            return
+        try:
+            _execute_meeting_statement(
+                conn, 'ins_meeting', (meeting_id, title, user_id, 'recording', now, now)
+            )
+            conn.commit()
+        except Exception as e:
+            logging.error(f"Error creating meeting record: {e}")
+
+def _complete_meeting(meeting_id, now):
+    """Mark a live recording's meeting as completed (runs on the thread pool)"""
+    with db_conn() as conn:
+        if not conn:
+            return
+        try:
+            _execute_meeting_statement(conn, 'upd_meeting', (now, meeting_id))
+            conn.commit()
+        except Exception as e:
+            logging.error(f"Error updating meeting status: {e}")
+
+def _to_json(payload):
+    """Serialize a WebSocket message with orjson, keeping text frames.
+    
+    datetime values are encoded natively as ISO 8601 strings.
+    """
+    return orjson.dumps(payload).decode()
+
+# Constant control messages, serialized once at import
+_MSG_INVALID_JSON = _to_json({'type': 'error', 'message': 'Invalid JSON format'})
+_MSG_RECORDING_STOPPED = _to_json({'type': 'recording_stopped', 'message': 'Meeting recording completed'})
+_MSG_MISSING_PROCESS_DATA = _to_json({'type': 'error', 'message': 'Missing required data for audio processing'})
+_MSG_PROCESSING_STARTED = _to_json({'type': 'processing_started', 'message': 'Starting audio processing...'})
+_MSG_NO_MEETING_CONTEXT = _to_json({'type': 'error', 'message': 'Send recording_started or audio_meta before binary audio'})
+
+# Max audio chunks buffered per connection before reads are paused
+TRANSCRIBE_QUEUE_SIZE = 8
+
+async def _transcribe_worker(websocket, processor, queue):
+    """Transcribe queued audio chunks in arrival order and push transcripts to the client"""
+    turn_order = 0
+    while True:
+        audio_data, user_id, meeting_id = await queue.get()
+        try:
+            transcript = await processor.process_audio_chunk(
+                audio_data,
+                user_id,
+                meeting_id
+            )
+            
+            if transcript:
+                turn_order += 1
+                await websocket.send(_to_json({
+                    'type': 'transcript',
+                    'text': transcript,
+                    'turn_order': turn_order,
+                    'timestamp': datetime.now()
+                }))
+        except websockets.exceptions.ConnectionClosed:
+            return
+        except Exception as e:
+            logging.error(f"Error transcribing queued audio chunk: {e}")
+        finally:
+            queue.task_done()
+
 async def handle_websocket_connection(websocket, path):
     """Handle WebSocket connections for audio streaming"""
-    client_id = None
+    client_id = _uuid4_strs(1)[0]
+    websocket_connections[client_id] = websocket
     user_id = None
     meeting_id = None
     
+    # Per-connection processor so each meeting's transcript stays separate
+    # and is released when the connection closes
+    processor = AudioProcessor()
+    
+    # Chunks are queued and transcribed by a background worker so reading
+    # the next frame never waits on the transcription API round trip
+    transcribe_queue = asyncio.Queue(maxsize=TRANSCRIBE_QUEUE_SIZE)
+    transcribe_worker = None
+    
+    async def enqueue_audio(audio_data):
+        nonlocal transcribe_worker
+        if transcribe_worker is None:
+            transcribe_worker = asyncio.create_task(_transcribe_worker(websocket, processor, transcribe_queue))
+        # Blocks while the queue is full, applying backpressure to the client
+        await transcribe_queue.put((audio_data, user_id, meeting_id))
+    
     try:
         logging.info(f"New WebSocket connection: {websocket.remote_address}")
         
         async for message in websocket:
             try:
+                # Binary frames carry raw audio, optionally behind a small
+                # metadata header; otherwise user and meeting come from
+                # earlier recording_started / audio_meta control messages
+                if isinstance(message, (bytes, bytearray, memoryview)):
+                    meta, audio = _split_audio_frame(message)
+                    if meta:
+                        user_id = meta.get('userId', user_id or 'anonymous')
+                        meeting_id = meta.get('meetingId', meeting_id)
+                    if meeting_id is None or user_id is None:
+                        # No meeting to attach the transcript or its tasks to
+                        await websocket.send(_MSG_NO_MEETING_CONTEXT)
+                        continue
+                    await enqueue_audio(audio)
+                    continue
+                
                 # Validate message format
                 if not message or not isinstance(message, str):
                     logging.warning("Invalid message format received")
@@ -282,16 +682,19 @@ async def handle_websocket_connection(websocket, path):
                 
                 # Parse JSON with error handling
                 try:
-                    data = json.loads(message)
-                except json.JSONDecodeError as json_error:
+                    data = orjson.loads(message)
+                except orjson.JSONDecodeError as json_error:
                     logging.error(f"JSON decode error: {json_error}")
-                    await websocket.send(json.dumps({
-                        'type': 'error',
-                        'message': 'Invalid JSON format'
-                    }))
+                    await websocket.send(_MSG_INVALID_JSON)
                     continue
                 
-                if data.get('type') == 'audio_chunk':
+                if data.get('type') == 'audio_meta':
+                    # Sets the context for subsequent binary audio frames
+                    user_id = data.get('userId', user_id or 'anonymous')
+                    meeting_id = data.get('meetingId', meeting_id)
+                
+                elif data.get('type') == 'audio_chunk':
+                    # Legacy path: base64 audio inside a JSON envelope
                     user_id = data.get('userId', 'anonymous')
                     meeting_id = data.get('meetingId')
                     
@@ -301,48 +704,22 @@ async def handle_websocket_connection(websocket, path):
                         logging.warning("Empty audio data received")
                         continue
                     
-                    # Process audio chunk
-                    transcript = await audio_processor.process_audio_chunk(
-                        audio_data,
-                        user_id,
-                        meeting_id
-                    )
-                    
-                    if transcript:
-                        # Send transcript back to client
-                        await websocket.send(json.dumps({
-                            'type': 'transcript',
-                            'text': transcript,
-                            'timestamp': datetime.now().isoformat()
-                        }))
+                    # Queue audio chunk; the worker sends the transcript back
+                    await enqueue_audio(audio_data)
                 
                 elif data.get('type') == 'recording_started':
                     user_id = data.get('userId', 'anonymous')
-                    meeting_id = str(uuid.uuid4())
+                    meeting_id = _uuid4_strs(1)[0]
                     
-                    # Create meeting record
-                    conn = get_db_connection()
-                    if conn:
-                        try:
-                            with conn.cursor() as cursor:
-                                cursor.execute("""
-                                    INSERT INTO meetings (id, title, user_id, status, created_at, updated_at)
-                                    VALUES (%s, %s, %s, %s, %s, %s)
-                                """, (
-                                    meeting_id,
-                                    f"Live Meeting - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                                    user_id,
-                                    'recording',
-                                    datetime.now(),
-                                    datetime.now()
-                                ))
-                                conn.commit()
-                        except Exception as e:
-                            logging.error(f"Error creating meeting record: {e}")
-                        finally:
-                            conn.close()
+                    # Create meeting record on the thread pool so the event
+                    # loop keeps serving other clients during the round trip
+                    now = datetime.now()
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, _insert_meeting, meeting_id, user_id,
+                        f"Live Meeting - {now.strftime('%Y-%m-%d %H:%M')}", now
+                    )
                     
-                    await websocket.send(json.dumps({
+                    await websocket.send(_to_json({
                         'type': 'meeting_created',
                         'meetingId': meeting_id,
                         'message': 'Meeting recording started'
@@ -350,26 +727,19 @@ async def handle_websocket_connection(websocket, path):
                 
                 elif data.get('type') == 'recording_stopped':
                     if meeting_id:
-                        # Update meeting status
-                        conn = get_db_connection()
-                        if conn:
-                            try:
-                                with conn.cursor() as cursor:
-                                    cursor.execute("""
-                                        UPDATE meetings 
-                                        SET status = 'completed', updated_at = %s
-                                        WHERE id = %s
-                                    """, (datetime.now(), meeting_id))
-                                    conn.commit()
-                            except Exception as e:
-                                logging.error(f"Error updating meeting status: {e}")
-                            finally:
-                                conn.close()
+                        # Transcribe chunks still queued first, so their
+                        # words reach the final insights batch instead of
+                        # recreating the meeting's state after it is dropped
+                        if transcribe_worker is not None:
+                            await transcribe_queue.join()
+
+                        # Update meeting status off the event loop
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, _complete_meeting, meeting_id, datetime.now()
+                        )
+                        await processor.finish_meeting(user_id, meeting_id)
                     
-                    await websocket.send(json.dumps({
-                        'type': 'recording_stopped',
-                        'message': 'Meeting recording completed'
-                    }))
+                    await websocket.send(_MSG_RECORDING_STOPPED)
                 
                 elif data.get('type') == 'process_audio':
                     # Process complete audio workflow
@@ -379,36 +749,32 @@ async def handle_websocket_connection(websocket, path):
                     meeting_title = data.get('meetingTitle', 'Meeting Recording')
                     
                     if not all([meeting_id, user_id, audio_data]):
-                        await websocket.send(json.dumps({
-                            'type': 'error',
-                            'message': 'Missing required data for audio processing'
-                        }))
+                        await websocket.send(_MSG_MISSING_PROCESS_DATA)
                         continue
                     
                     try:
-                        # Decode base64 audio data
-                        if audio_data.startswith('data:audio'):
-                            audio_data = audio_data.split(',')[1]
-                        
-                        audio_bytes = base64.b64decode(audio_data)
+                        # Decode base64 audio data off the event loop
+                        loop = asyncio.get_running_loop()
+                        audio_bytes = await loop.run_in_executor(None, _decode_base64_audio, audio_data)
+                        if audio_bytes is None:
+                            await websocket.send(_to_json({
+                                'type': 'processing_error',
+                                'message': 'Invalid audio data'
+                            }))
+                            continue
                         
-                        # Import and use the audio processor service
-                        from services.audio_processor import AudioProcessorService
-                        processor = AudioProcessorService()
+                        service = get_audio_processor_service()
                         
                         # Send processing started message
-                        await websocket.send(json.dumps({
-                            'type': 'processing_started',
-                            'message': 'Starting audio processing...'
-                        }))
+                        await websocket.send(_MSG_PROCESSING_STARTED)
                         
                         # Process complete workflow
-                        result = await processor.process_complete_workflow(
+                        result = await service.process_complete_workflow(
                             audio_bytes, meeting_id, user_id, meeting_title
                         )
                         
                         if result.get('success'):
-                            await websocket.send(json.dumps({
+                            await websocket.send(_to_json({
                                 'type': 'processing_completed',
                                 'message': 'Audio processing completed successfully',
                                 'data': {
@@ -418,26 +784,23 @@ async def handle_websocket_connection(websocket, path):
                                 }
                             }))
                         else:
-                            await websocket.send(json.dumps({
+                            await websocket.send(_to_json({
                                 'type': 'processing_error',
                                 'message': result.get('error', 'Unknown processing error')
                             }))
                             
                     except Exception as e:
                         logging.error(f"Error processing audio: {e}")
-                        await websocket.send(json.dumps({
+                        await websocket.send(_to_json({
                             'type': 'processing_error',
                             'message': f'Processing failed: {str(e)}'
                         }))
                 
-            except json.JSONDecodeError:
-                await websocket.send(json.dumps({
-                    'type': 'error',
-                    'message': 'Invalid JSON format'
-                }))
+            except orjson.JSONDecodeError:
+                await websocket.send(_MSG_INVALID_JSON)
             except Exception as e:
                 logging.error(f"Error processing WebSocket message: {e}")
-                await websocket.send(json.dumps({
+                await websocket.send(_to_json({
                     'type': 'error',
                     'message': str(e)
                 }))
@@ -447,38 +810,59 @@ async def handle_websocket_connection(websocket, path):
     except Exception as e:
         logging.error(f"WebSocket error: {e}")
     finally:
-        if client_id in websocket_connections:
-            del websocket_connections[client_id]
+        if transcribe_worker is not None:
+            transcribe_worker.cancel()
+        websocket_connections.pop(client_id, None)
+
+WEBSOCKET_HOST = "localhost"
+WEBSOCKET_PORTS = [5001, 5002, 5003, 5004, 5005]
+WEBSOCKET_MAX_MESSAGE_SIZE = 2 ** 22  # 4 MiB
+WEBSOCKET_LOCK_PATH = os.path.join(tempfile.gettempdir(), 'meetingai-ws.lock')
+
+def _bind_websocket_socket():
+    """Bind the first free port in WEBSOCKET_PORTS, or return None"""
+    for port in WEBSOCKET_PORTS:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind((WEBSOCKET_HOST, port))
+            return sock
+        except OSError:
+            sock.close()
+            logging.warning(f"Port {port} is busy, trying next port...")
+    return None
 
 def start_websocket_server():
     """Start WebSocket server for audio streaming"""
     try:
-        import asyncio
-        import websockets
+        # Pick the port synchronously so failures surface at startup
+        sock = _bind_websocket_socket()
+        if sock is None:
+            logging.error("Could not find an available port for WebSocket server")
+            return
+        port = sock.getsockname()[1]
         
         async def server():
-            # Try different ports if 5001 is busy
-            ports_to_try = [5001, 5002, 5003, 5004, 5005]
+            # Thread pool used for run_in_executor offloads (base64 decoding, DB writes)
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=16))
             
-            for port in ports_to_try:
-                try:
-                    async with websockets.serve(handle_websocket_connection, "localhost", port):
-                        logging.info(f"WebSocket server started on ws://localhost:{port}/audio")
-                        await asyncio.Future()  # Run forever
-                        break
-                except OSError as e:
-                    if "Address already in use" in str(e) or "only one usage of each socket address" in str(e):
-                        logging.warning(f"Port {port} is busy, trying next port...")
-                        continue
-                    else:
-                        raise e
-            else:
-                logging.error("Could not find an available port for WebSocket server")
+            # Audio is already compressed (opus/webm), so permessage-deflate
+            # would only burn CPU; max_size covers one full audio chunk
+            async with websockets.serve(
+                handle_websocket_connection,
+                sock=sock,
+                compression=None,
+                max_size=WEBSOCKET_MAX_MESSAGE_SIZE
+            ):
+                logging.info(f"WebSocket server started on ws://{WEBSOCKET_HOST}:{port}/audio")
+                await asyncio.Future()  # Run forever
         
-        # Run WebSocket server in a separate thread
+        # Flask is served by a sync WSGI server, so the WebSocket server
+        # gets its own event loop in a daemon thread
         def run_server():
             try:
-                asyncio.run(server())
+                loop_factory = uvloop.new_event_loop if uvloop else None
+                with asyncio.Runner(loop_factory=loop_factory) as runner:
+                    runner.run(server())
             except Exception as e:
                 logging.error(f"WebSocket server error: {e}")
         
@@ -489,6 +873,36 @@ def start_websocket_server():
     except Exception as e:
         logging.error(f"Error starting WebSocket server: {e}")
 
-# Only start WebSocket server if not in test mode
-if not os.getenv('TESTING', '').lower() in ['true', '1', 'yes']:
+# Held for the life of the process by the worker that owns the WebSocket server
+_ws_lock_file = None
+
+def _acquire_ws_lock():
+    """Let only one process per host run the WebSocket server (e.g. one gunicorn worker)"""
+    global _ws_lock_file
+    if fcntl is None:
+        # No flock on Windows; the dev server runs a single process anyway
+        return True
+    lock_file = open(WEBSOCKET_LOCK_PATH, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _ws_lock_file = lock_file
+    return True
+
+def init_ws_server(app):
+    """Start the audio WebSocket server once, from app startup.
+    
+    Skipped in test mode, when ENABLE_WS is not '1', when this app has
+    already started it, or when another process on the host holds it.
+    """
+    if os.getenv('TESTING', '').lower() in ['true', '1', 'yes']:
+        return
+    if os.getenv('ENABLE_WS', '1') != '1' or app.config.get('_ws_started'):
+        return
+    if not _acquire_ws_lock():
+        logging.info("WebSocket server already running in another process")
+        return
     start_websocket_server()
+    app.config['_ws_started'] = True
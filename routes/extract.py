@@ -5,81 +5,150 @@ import logging
 import json
 from datetime import datetime, timedelta
 import re
+import time
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from urllib3.exceptions import NewConnectionError
 from dotenv import load_dotenv
+from sqlalchemy import func, insert
+from models import db, Meeting, Task, TaskStatus, TaskPriority, TaskCategory
 
 load_dotenv()
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        DATABASE_URL = os.getenv('DATABASE_URL')
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    except Exception as e:
-        logging.error(f"Database connection error: {e}")
-        return None
+# Read once at import so a missing key shows up in the startup log
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+if not GEMINI_API_KEY:
+    logging.warning("GEMINI_API_KEY is not set - meeting extraction will fail")
 
 extract_bp = Blueprint('extract', __name__)
 
-def extract_with_gemini(transcript, meeting_id):
-    """Extract tasks, decisions, and unresolved questions using Gemini API ONLY"""
-    try:
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("Gemini API key not configured - extraction requires Gemini")
-        
-        # Prepare the prompt for Gemini
-        prompt = f"""
+# Fallback for pulling the JSON object out of a Gemini reply wrapped in prose
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+GEMINI_API_BASE = 'https://generativelanguage.googleapis.com/v1beta'
+GEMINI_MODEL = 'gemini-pro'
+
+# Static part of the extraction prompt, identical for every meeting
+EXTRACTION_INSTRUCTIONS = """
         Analyze the following meeting transcript and extract structured information. 
         Return a JSON response with the following format:
         
-        {{
+        {
             "decisions": [
-                {{
+                {
                     "text": "Decision description",
                     "timestamp": "HH:MM",
                     "impact": "high|medium|low"
-                }}
+                }
             ],
             "action_items": [
-                {{
+                {
                     "text": "Action item description",
                     "owner": "Person responsible",
                     "deadline": "YYYY-MM-DD or relative date (e.g., 'next Friday')",
                     "priority": "high|medium|low"
-                }}
+                }
             ],
             "unresolved_questions": [
-                {{
+                {
                     "text": "Question or issue that needs resolution",
                     "context": "Brief context about when it was mentioned",
                     "urgency": "high|medium|low"
-                }}
+                }
             ],
             "summary": "Brief meeting summary (2-3 sentences)"
-        }}
-        
-        Meeting Transcript:
-        {transcript}
+        }
         
-        Please analyze this transcript carefully and extract all decisions made, action items assigned, and unresolved questions that need follow-up. 
+        Please analyze the transcript carefully and extract all decisions made, action items assigned, and unresolved questions that need follow-up. 
         For action items, try to identify the person responsible and estimate reasonable deadlines.
         For decisions, note the approximate time they were made and their potential impact.
         For unresolved questions, provide context about when they were raised.
         """
-        
-        # Make request to Gemini API
-        headers = {
-            'Content-Type': 'application/json',
+
+def _items_schema(**fields):
+    """Gemini response schema for an array of objects with string fields"""
+    return {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {name: {"type": "STRING"} for name in fields},
+            "required": [name for name, required in fields.items() if required]
         }
+    }
+
+# Structured-output schema mirroring the format in EXTRACTION_INSTRUCTIONS,
+# so Gemini returns bare JSON instead of JSON wrapped in prose
+EXTRACTION_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "decisions": _items_schema(text=True, timestamp=False, impact=False),
+        "action_items": _items_schema(text=True, owner=False, deadline=False, priority=False),
+        "unresolved_questions": _items_schema(text=True, context=False, urgency=False),
+        "summary": {"type": "STRING"}
+    },
+    "required": ["decisions", "action_items", "unresolved_questions", "summary"]
+}
+
+# Keep-alive session shared by all Gemini calls, so each extraction reuses
+# a pooled TLS connection instead of opening a new one
+_gemini_session = requests.Session()
+_gemini_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=32))
+
+GEMINI_CONNECT_TIMEOUT = 2
+GEMINI_READ_TIMEOUT = 30
+# Budget for all attempts together; the single call this replaced waited 60s
+GEMINI_TOTAL_TIMEOUT = 60
+GEMINI_MAX_ATTEMPTS = 3
+# generateContent is not idempotent and every call is billed, so only
+# rejections that mean the request was not processed are retried
+GEMINI_RETRY_STATUSES = {429, 503}
+
+def _is_connect_error(exc):
+    """Whether a requests ConnectionError happened before the request was sent"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+def gemini_post(url, payload):
+    """POST to Gemini, retrying connect errors, 429 and 503 with exponential backoff.
+    
+    Read timeouts and other 5xx are not retried, since Gemini may already
+    have processed the request. All attempts share GEMINI_TOTAL_TIMEOUT.
+    """
+    deadline = time.monotonic() + GEMINI_TOTAL_TIMEOUT
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        read_timeout = min(GEMINI_READ_TIMEOUT, deadline - time.monotonic() - GEMINI_CONNECT_TIMEOUT)
+        response = error = None
+        try:
+            response = _gemini_session.post(
+                url, json=payload, timeout=(GEMINI_CONNECT_TIMEOUT, read_timeout)
+            )
+            retryable = response.status_code in GEMINI_RETRY_STATUSES
+        except requests.exceptions.ConnectionError as e:
+            error = e
+            retryable = _is_connect_error(e)
+        
+        backoff = 0.5 * 2 ** attempt
+        # Retry only if a further attempt still gets a useful read window
+        if (not retryable or attempt == GEMINI_MAX_ATTEMPTS - 1
+                or time.monotonic() + backoff + GEMINI_CONNECT_TIMEOUT + 1 >= deadline):
+            if error is not None:
+                raise error
+            return response
+        logging.warning(f"Gemini request failed ({error or response.status_code}), retrying")
+        time.sleep(backoff)
+
+def extract_with_gemini(transcript, meeting_id):
+    """Extract tasks, decisions, and unresolved questions using Gemini API ONLY"""
+    try:
+        api_key = GEMINI_API_KEY
+        if not api_key:
+            raise ValueError("Gemini API key not configured - extraction requires Gemini")
         
         payload = {
             "contents": [{
                 "parts": [{
-                    "text": prompt
+                    "text": f"{EXTRACTION_INSTRUCTIONS}\n        Meeting Transcript:\n        {transcript}\n"
                 }]
             }],
             "generationConfig": {
@@ -87,30 +156,34 @@ def extract_with_gemini(transcript, meeting_id):
                 "topK": 1,
                 "topP": 0.8,
                 "maxOutputTokens": 2048,
+                "responseMimeType": "application/json",
+                "responseSchema": EXTRACTION_RESPONSE_SCHEMA,
             }
         }
         
-        response = requests.post(
-            f'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}',
-            headers=headers,
-            json=payload,
-            timeout=60
+        response = gemini_post(
+            f'{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent?key={api_key}',
+            payload
         )
         
         if response.status_code == 200:
             result = response.json()
             content = result['candidates'][0]['content']['parts'][0]['text']
             
-            # Extract JSON from the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
+            # JSON mode returns the object directly
+            try:
+                extracted_data = json.loads(content)
+            except json.JSONDecodeError:
+                # Fallback for models that ignore responseMimeType
+                json_match = _JSON_OBJECT_RE.search(content)
+                if not json_match:
+                    raise Exception("No valid JSON found in Gemini response")
                 extracted_data = json.loads(json_match.group())
-                return {
-                    'success': True,
-                    'data': extracted_data
-                }
-            else:
-                raise Exception("No valid JSON found in Gemini response")
+            
+            return {
+                'success': True,
+                'data': extracted_data
+            }
         else:
             logging.error(f"Gemini API error: {response.status_code} - {response.text}")
             return {
@@ -127,21 +200,30 @@ def extract_with_gemini(transcript, meeting_id):
             'details': str(e)
         }
 
-def parse_deadline(deadline_str):
-    """Parse deadline string to datetime object"""
+# Weekday names accepted in relative deadlines such as "next friday"
+_WEEKDAY_RE = re.compile(r'\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b')
+_WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+def parse_deadline(deadline_str, now=None):
+    """Parse deadline string to datetime object.
+    
+    Relative dates are resolved against now, so a caller parsing many
+    deadlines can read the clock once and pass it in.
+    """
+    if now is None:
+        now = datetime.now()
     try:
-        # Handle relative dates
-        if 'next' in deadline_str.lower():
-            if 'friday' in deadline_str.lower():
-                days_ahead = 4 - datetime.now().weekday()  # Friday is 4
-                if days_ahead <= 0:  # Target day already happened this week
-                    days_ahead += 7
-                return datetime.now() + timedelta(days=days_ahead)
-            elif 'monday' in deadline_str.lower():
-                days_ahead = 0 - datetime.now().weekday()  # Monday is 0
-                if days_ahead <= 0:
-                    days_ahead += 7
-                return datetime.now() + timedelta(days=days_ahead)
+        # Handle relative dates, e.g. "next friday"
+        deadline_lower = deadline_str.lower()
+        if 'next' in deadline_lower:
+            day_match = _WEEKDAY_RE.search(deadline_lower)
+            if day_match:
+                # Always a future day: today's weekday means a week from now
+                days_ahead = (_WEEKDAYS[day_match.group(1)] - now.weekday()) % 7 or 7
+                return now + timedelta(days=days_ahead)
             # Add more relative date parsing as needed
         
         # Handle absolute dates
@@ -151,68 +233,71 @@ def parse_deadline(deadline_str):
             pass
         
         # Default to 1 week from now if parsing fails
-        return datetime.now() + timedelta(days=7)
+        return now + timedelta(days=7)
         
     except Exception:
-        return datetime.now() + timedelta(days=7)
+        return now + timedelta(days=7)
+
+# Gemini high/medium/low ratings as TaskPriority; anything else is LOW
+_PRIORITY_BY_LEVEL = {
+    'high': TaskPriority.HIGH,
+    'medium': TaskPriority.MEDIUM,
+}
 
 def create_tasks_from_extraction(meeting_id, user_id, extracted_data):
-    """Create task records from extracted data"""
-    tasks_created = []
+    """Create task records from extracted data.
+    
+    All rows go to the database in a single multi-row INSERT; returns the
+    inserted row dicts.
+    """
+    # Read the clock once per extraction rather than once per task
+    now = datetime.now()
+    completed_at = datetime.utcnow()
+    # Bound once; looked up for every extracted item
+    priority_for = _PRIORITY_BY_LEVEL.get
+    low = TaskPriority.LOW
     
     try:
-        # Create decision tasks
-        for decision in extracted_data.get('decisions', []):
-            task = Task(
-                name=decision['text'],
-                description=f"Decision made at {decision.get('timestamp', 'unknown time')}",
-                category=TaskCategory.DECISION,
-                priority=TaskPriority.HIGH if decision.get('impact') == 'high' else 
-                        TaskPriority.MEDIUM if decision.get('impact') == 'medium' else TaskPriority.LOW,
-                status=TaskStatus.COMPLETED,  # Decisions are considered completed when made
-                meeting_id=meeting_id,
-                user_id=user_id,
-                completed_at=datetime.utcnow()
-            )
-            db.session.add(task)
-            tasks_created.append(task)
+        # Decision tasks
+        rows = [dict(
+            name=decision['text'],
+            description=f"Decision made at {decision.get('timestamp', 'unknown time')}",
+            category=TaskCategory.DECISION,
+            priority=priority_for(decision.get('impact'), low),
+            status=TaskStatus.COMPLETED,  # Decisions are considered completed when made
+            meeting_id=meeting_id,
+            user_id=user_id,
+            completed_at=completed_at
+        ) for decision in extracted_data.get('decisions', [])]
         
-        # Create action item tasks
-        for action in extracted_data.get('action_items', []):
-            deadline = parse_deadline(action.get('deadline', 'next week'))
-            
-            task = Task(
-                name=action['text'],
-                description=f"Action item assigned to {action.get('owner', 'TBD')}",
-                owner=action.get('owner', 'TBD'),
-                category=TaskCategory.ACTION_ITEM,
-                priority=TaskPriority.HIGH if action.get('priority') == 'high' else 
-                        TaskPriority.MEDIUM if action.get('priority') == 'medium' else TaskPriority.LOW,
-                status=TaskStatus.PENDING,
-                deadline=deadline,
-                meeting_id=meeting_id,
-                user_id=user_id
-            )
-            db.session.add(task)
-            tasks_created.append(task)
+        # Action item tasks
+        rows.extend(dict(
+            name=action['text'],
+            description=f"Action item assigned to {action.get('owner', 'TBD')}",
+            owner=action.get('owner', 'TBD'),
+            category=TaskCategory.ACTION_ITEM,
+            priority=priority_for(action.get('priority'), low),
+            status=TaskStatus.PENDING,
+            deadline=parse_deadline(action.get('deadline', 'next week'), now),
+            meeting_id=meeting_id,
+            user_id=user_id
+        ) for action in extracted_data.get('action_items', []))
         
-        # Create unresolved question tasks
-        for question in extracted_data.get('unresolved_questions', []):
-            task = Task(
-                name=question['text'],
-                description=question.get('context', 'Unresolved question from meeting'),
-                category=TaskCategory.UNRESOLVED,
-                priority=TaskPriority.HIGH if question.get('urgency') == 'high' else 
-                        TaskPriority.MEDIUM if question.get('urgency') == 'medium' else TaskPriority.LOW,
-                status=TaskStatus.PENDING,
-                meeting_id=meeting_id,
-                user_id=user_id
-            )
-            db.session.add(task)
-            tasks_created.append(task)
+        # Unresolved question tasks
+        rows.extend(dict(
+            name=question['text'],
+            description=question.get('context', 'Unresolved question from meeting'),
+            category=TaskCategory.UNRESOLVED,
+            priority=priority_for(question.get('urgency'), low),
+            status=TaskStatus.PENDING,
+            meeting_id=meeting_id,
+            user_id=user_id
+        ) for question in extracted_data.get('unresolved_questions', []))
         
+        if rows:
+            db.session.execute(insert(Task), rows)
         db.session.commit()
-        return tasks_created
+        return rows
         
     except Exception as e:
         db.session.rollback()
@@ -295,23 +380,31 @@ def extract_meeting_insights(meeting_id):
 def get_extraction_status(meeting_id):
     """Get extraction status for a meeting"""
     try:
-        meeting = Meeting.query.get(meeting_id)
-        if not meeting:
+        # Meeting columns and per-category task counts in one query; the
+        # outer join yields a single NULL-category row for a meeting with no tasks
+        rows = (
+            db.session.query(Meeting.id, Meeting.status, Meeting.updated_at, Task.category, func.count(Task.id))
+            .outerjoin(Task, Task.meeting_id == Meeting.id)
+            .filter(Meeting.id == meeting_id)
+            .group_by(Meeting.id, Meeting.status, Meeting.updated_at, Task.category)
+            .all()
+        )
+        if not rows:
             return jsonify({'error': 'Meeting not found'}), 404
         
-        # Count tasks by category
-        tasks = Task.query.filter_by(meeting_id=meeting_id).all()
+        meeting = rows[0]
+        counts = {row[3]: row[4] for row in rows if row[3] is not None}
         task_counts = {
-            'decisions': len([t for t in tasks if t.category == TaskCategory.DECISION]),
-            'action_items': len([t for t in tasks if t.category == TaskCategory.ACTION_ITEM]),
-            'unresolved': len([t for t in tasks if t.category == TaskCategory.UNRESOLVED])
+            'decisions': counts.get(TaskCategory.DECISION, 0),
+            'action_items': counts.get(TaskCategory.ACTION_ITEM, 0),
+            'unresolved': counts.get(TaskCategory.UNRESOLVED, 0)
         }
         
         return jsonify({
             'meeting_id': meeting.id,
             'status': meeting.status,
             'task_counts': task_counts,
-            'total_tasks': len(tasks),
+            'total_tasks': sum(counts.values()),
             'updated_at': meeting.updated_at.isoformat() if meeting.updated_at else None
         })
         
@@ -1,92 +1,181 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 import logging
+import base64
+import binascii
+import hashlib
+import orjson
 from datetime import datetime, timedelta
-import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
 from dotenv import load_dotenv
+from database import db_conn, execute_prepared
 
 load_dotenv()
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        # Import the connection pool from the main app
-        from app import get_db_connection as app_get_db_connection
-        return app_get_db_connection()
-    except ImportError:
-        # Fallback if importing fails
-        try:
-            DATABASE_URL = os.getenv('DATABASE_URL')
-            conn = psycopg2.connect(DATABASE_URL)
-            return conn
-        except Exception as e:
-            logging.error(f"Database connection error: {e}")
-            return None
-    except Exception as e:
-        logging.error(f"Database connection error: {e}")
-        return None
+meeting_bp = Blueprint('meeting', __name__)
 
-def return_db_connection(conn):
-    """Return database connection to pool"""
-    try:
-        from app import return_db_connection as app_return_db_connection
-        app_return_db_connection(conn)
-    except ImportError:
-        # Fallback if importing fails
-        if conn:
-            conn.close()
-    except Exception as e:
-        logging.error(f"Error returning connection: {e}")
-        if conn:
-            conn.close()
+# Hot read queries, run as per-connection prepared statements. Columns are
+# listed explicitly: a prepared SELECT * fails once ALTER TABLE changes its
+# result type.
+MEETING_WITH_TASKS_SQL = """
+    SELECT m.id, m.title, m.transcript, m.file_path, m.file_name, m.file_size,
+           m.duration, m.participants, m.status, m.language, m.confidence,
+           m.error_message, m.timeline, m.user_id, m.created_at, m.updated_at,
+           COALESCE(v.tasks, '[]'::json) AS tasks,
+           v.task_count AS _task_count,
+           v.tasks_updated_at AS _tasks_updated_at
+    FROM meetings m
+    CROSS JOIN LATERAL (
+        SELECT json_agg(t ORDER BY t.created_at DESC) AS tasks,
+               COUNT(*) AS task_count,
+               MAX(t.updated_at) AS tasks_updated_at
+        FROM tasks t WHERE t.meeting_id = m.id
+    ) v
+    WHERE m.id = $1
+"""
 
-meeting_bp = Blueprint('meeting', __name__)
+# Just the inputs of a meeting's ETag, for answering If-None-Match cheaply
+MEETING_VERSION_SQL = """
+    SELECT m.updated_at,
+           COUNT(t.id) AS task_count,
+           MAX(t.updated_at) AS tasks_updated_at
+    FROM meetings m
+    LEFT JOIN tasks t ON t.meeting_id = m.id
+    WHERE m.id = $1
+    GROUP BY m.id, m.updated_at
+"""
+
+# Columns a meeting listing needs; the large transcript/timeline columns are
+# only returned by get_meeting
+MEETING_LIST_COLUMNS = (
+    "id, title, file_name, file_size, duration, participants, status, "
+    "user_id, created_at, updated_at"
+)
+
+# Task counts for a page of meetings, built alongside it. The lateral runs
+# once per page row (outside the LIMIT and the window count). Rows written
+# through the ORM store enum names (ACTION_ITEM), others the values (action-item).
+def _with_task_counts(page_sql):
+    """Wrap a meetings page query so each row also carries its task_counts"""
+    return f"""
+        SELECT page.*, counts.task_counts FROM ({page_sql}) page
+        CROSS JOIN LATERAL (
+            SELECT json_build_object(
+                'decisions', COUNT(*) FILTER (WHERE LOWER(category::text) = 'decision'),
+                'action_items', COUNT(*) FILTER (WHERE LOWER(category::text) IN ('action_item', 'action-item')),
+                'unresolved', COUNT(*) FILTER (WHERE LOWER(category::text) = 'unresolved')
+            ) AS task_counts
+            FROM tasks WHERE tasks.meeting_id = page.id
+        ) counts
+        ORDER BY page.created_at DESC, page.id DESC
+    """
+
+# The window count carries the total on every row, so no separate COUNT
+USER_MEETINGS_PAGE_SQL = _with_task_counts(f"""
+    SELECT {MEETING_LIST_COLUMNS}, COUNT(*) OVER () AS _total FROM meetings 
+    WHERE user_id = $1 
+    ORDER BY created_at DESC, id DESC 
+    LIMIT $2 OFFSET $3
+""")
+
+# Keyset page: seek past the cursor on the (user_id, created_at, id) index
+USER_MEETINGS_AFTER_SQL = _with_task_counts(f"""
+    SELECT {MEETING_LIST_COLUMNS} FROM meetings 
+    WHERE user_id = %s AND (created_at, id) < (%s, %s)
+    ORDER BY created_at DESC, id DESC 
+    LIMIT %s
+""")
+
+# OFFSET page without the total
+USER_MEETINGS_OFFSET_SQL = _with_task_counts(f"""
+    SELECT {MEETING_LIST_COLUMNS} FROM meetings 
+    WHERE user_id = %s 
+    ORDER BY created_at DESC, id DESC 
+    LIMIT %s OFFSET %s
+""")
+
+# Every meeting of a user, for the NDJSON stream
+USER_MEETINGS_ALL_SQL = _with_task_counts(f"""
+    SELECT {MEETING_LIST_COLUMNS} FROM meetings WHERE user_id = %s
+""")
+
+# Rows pulled from the server-side cursor per round trip while streaming
+MEETING_STREAM_BATCH = 500
+
+MEETING_STATS_SQL = """
+    SELECT 
+        COUNT(*) as total_meetings,
+        COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_meetings,
+        COUNT(CASE WHEN status = 'scheduled' THEN 1 END) as scheduled_meetings,
+        COUNT(CASE WHEN status = 'in_progress' THEN 1 END) as in_progress_meetings,
+        COUNT(CASE WHEN status = 'cancelled' THEN 1 END) as cancelled_meetings,
+        AVG(duration) as avg_duration,
+        SUM(duration) as total_duration,
+        COUNT(CASE WHEN created_at >= NOW() - INTERVAL '30 days' THEN 1 END) as meetings_last_30_days,
+        COUNT(CASE WHEN created_at >= NOW() - INTERVAL '7 days' THEN 1 END) as meetings_last_7_days
+    FROM meetings WHERE user_id = $1
+"""
+
+def _meeting_etag(updated_at, task_count, tasks_updated_at):
+    """Version tag for a meeting and its tasks"""
+    token = f"{updated_at}|{task_count}|{tasks_updated_at}"
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+def _meeting_response(meeting, etag):
+    """Meeting JSON tagged with its ETag, or a bodiless 304 if the client has it"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(meeting)
+    response.set_etag(etag)
+    return response
+
+def _encode_meeting_cursor(meeting):
+    """Opaque keyset cursor pointing just past the given meeting row"""
+    raw = f"{meeting['created_at'].isoformat()}|{meeting['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_meeting_cursor(cursor):
+    """Inverse of _encode_meeting_cursor; raises ValueError when malformed"""
+    created_at, _, meeting_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition('|')
+    if not meeting_id:
+        raise ValueError('cursor has no meeting id')
+    return datetime.fromisoformat(created_at), meeting_id
 
 @meeting_bp.route('/meeting/<meeting_id>', methods=['GET'])
 def get_meeting(meeting_id):
     """Get meeting details with transcript, tasks, and insights"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Get meeting details
-            cur.execute("SELECT * FROM meetings WHERE id = %s", (meeting_id,))
-            meeting = cur.fetchone()
-            
-            if not meeting:
-                return jsonify({'error': 'Meeting not found'}), 404
-            
-            # Get tasks for this meeting
-            cur.execute("SELECT * FROM tasks WHERE meeting_id = %s ORDER BY created_at DESC", (meeting_id,))
-            tasks = cur.fetchall()
-            
-            # Convert to dict and handle datetime objects
-            meeting_dict = dict(meeting)
-            for key, value in meeting_dict.items():
-                if isinstance(value, datetime):
-                    meeting_dict[key] = value.isoformat()
-            
-            tasks_list = []
-            for task in tasks:
-                task_dict = dict(task)
-                for key, value in task_dict.items():
-                    if isinstance(value, datetime):
-                        task_dict[key] = value.isoformat()
-                tasks_list.append(task_dict)
-            
-            meeting_dict['tasks'] = tasks_list
-            
-            return jsonify(meeting_dict)
-            
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                if request.if_none_match:
+                    # Revalidation: compare versions before loading anything
+                    execute_prepared(cur, 'meeting_version', MEETING_VERSION_SQL, (meeting_id,))
+                    version = cur.fetchone()
+                    if not version:
+                        return jsonify({'error': 'Meeting not found'}), 404
+                    etag = _meeting_etag(version['updated_at'], version['task_count'], version['tasks_updated_at'])
+                    if request.if_none_match.contains(etag):
+                        return _meeting_response(None, etag)
+                
+                # Meeting and its tasks in one round trip. json_agg renders
+                # the task timestamps as ISO 8601 strings already.
+                execute_prepared(cur, 'meeting_detail', MEETING_WITH_TASKS_SQL, (meeting_id,))
+                meeting = cur.fetchone()
+                
+                if not meeting:
+                    return jsonify({'error': 'Meeting not found'}), 404
+                etag = _meeting_etag(
+                    meeting['updated_at'], meeting.pop('_task_count'), meeting.pop('_tasks_updated_at')
+                )
+                return _meeting_response(meeting, etag)
+                
     except Exception as e:
         logging.error(f"Error fetching meeting: {e}")
         return jsonify({'error': 'Failed to fetch meeting'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
 
 @meeting_bp.route('/meetings/user/<user_id>', methods=['GET'])
 def get_user_meetings(user_id):
@@ -95,56 +184,114 @@ def get_user_meetings(user_id):
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor_param = request.args.get('cursor')
+        # Counting every meeting is the expensive part of a page load; clients
+        # that only need has_next can pass include_total=false
+        include_total = request.args.get('include_total', 'true').lower() not in ['false', '0', 'no']
+        if cursor_param:
+            try:
+                cursor_created_at, cursor_id = _decode_meeting_cursor(cursor_param)
+            except (ValueError, binascii.Error, UnicodeDecodeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Check if user exists
-            cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
-            user = cur.fetchone()
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
-            
-            # Count total meetings
-            cur.execute("SELECT COUNT(*) as total FROM meetings WHERE user_id = %s", (user_id,))
-            total_meetings = cur.fetchone()['total']
-            
-            # Get meetings with pagination
-            cur.execute("""
-                SELECT * FROM meetings 
-                WHERE user_id = %s 
-                ORDER BY created_at DESC 
-                LIMIT %s OFFSET %s
-            """, (user_id, per_page, (page - 1) * per_page))
-            meetings = cur.fetchall()
-            
-            # Convert to dict and handle datetime objects
-            meetings_list = []
-            for meeting in meetings:
-                meeting_dict = dict(meeting)
-                for key, value in meeting_dict.items():
-                    if isinstance(value, datetime):
-                        meeting_dict[key] = value.isoformat()
-                meetings_list.append(meeting_dict)
-            
-            return jsonify({
-                'meetings': meetings_list,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total_meetings,
-                    'pages': (total_meetings + per_page - 1) // per_page
-                }
-            })
-            
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Each query returns the page with its task counts already attached
+                if cursor_param:
+                    # Keyset pagination: seek past the cursor instead of skipping rows
+                    cur.execute(USER_MEETINGS_AFTER_SQL, (user_id, cursor_created_at, cursor_id, per_page + 1))
+                    meetings = cur.fetchall()
+                    has_next = len(meetings) > per_page
+                    del meetings[per_page:]
+                    pagination = {'per_page': per_page}
+                elif not include_total:
+                    # One extra row tells us whether another page exists
+                    cur.execute(USER_MEETINGS_OFFSET_SQL, (user_id, per_page + 1, (page - 1) * per_page))
+                    meetings = cur.fetchall()
+                    has_next = len(meetings) > per_page
+                    del meetings[per_page:]
+                    pagination = {'page': page, 'per_page': per_page, 'has_prev': page > 1}
+                else:
+                    # Get meetings with pagination
+                    execute_prepared(
+                        cur, 'user_meetings_page_with_counts', USER_MEETINGS_PAGE_SQL,
+                        (user_id, per_page, (page - 1) * per_page)
+                    )
+                    meetings = cur.fetchall()
+                    
+                    if meetings:
+                        total_meetings = meetings[0]['_total']
+                        for meeting in meetings:
+                            del meeting['_total']
+                    elif page > 1:
+                        # Past the last page: no rows to read the total from
+                        cur.execute("SELECT COUNT(*) as total FROM meetings WHERE user_id = %s", (user_id,))
+                        total_meetings = cur.fetchone()['total']
+                    else:
+                        total_meetings = 0
+                    has_next = page * per_page < total_meetings
+                    pagination = {
+                        'page': page,
+                        'per_page': per_page,
+                        'total': total_meetings,
+                        'pages': (total_meetings + per_page - 1) // per_page
+                    }
+                
+                if not meetings:
+                    # Only an empty page needs the separate user check; any
+                    # returned meeting already proves the user exists
+                    cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+                    user = cur.fetchone()
+                    if not user:
+                        return jsonify({'error': 'User not found'}), 404
+                
+                pagination['has_next'] = has_next
+                pagination['next_cursor'] = _encode_meeting_cursor(meetings[-1]) if has_next else None
+                
+                return jsonify({
+                    'meetings': meetings,
+                    'pagination': pagination
+                })
+                
     except Exception as e:
         logging.error(f"Error fetching meetings: {e}")
         return jsonify({'error': 'Failed to fetch meetings'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
+
+@meeting_bp.route('/meetings/user/<user_id>/stream', methods=['GET'])
+def stream_user_meetings(user_id):
+    """Stream all of a user's meetings as NDJSON, one meeting per line"""
+    try:
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM users WHERE id = %s", (user_id,))
+                if not cur.fetchone():
+                    return jsonify({'error': 'User not found'}), 404
+    except Exception as e:
+        logging.error(f"Error fetching meetings: {e}")
+        return jsonify({'error': 'Failed to fetch meetings'}), 500
+    
+    def generate():
+        # A named cursor keeps the result set on the server, so rows are sent
+        # as they're fetched instead of loading every meeting into memory
+        with db_conn() as conn:
+            if not conn:
+                return
+            try:
+                with conn.cursor('meetings_stream', cursor_factory=RealDictCursor) as cur:
+                    cur.itersize = MEETING_STREAM_BATCH
+                    cur.execute(USER_MEETINGS_ALL_SQL, (user_id,))
+                    for meeting in cur:
+                        yield orjson.dumps(meeting) + b'\n'
+            except Exception as e:
+                # Headers are already sent, so the stream just ends early
+                logging.error(f"Error streaming meetings: {e}")
+    
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @meeting_bp.route('/meetings', methods=['POST'])
 def create_meeting():
@@ -158,49 +305,38 @@ def create_meeting():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Check if user exists
-            cur.execute("SELECT id FROM users WHERE id = %s", (data['user_id'],))
-            user = cur.fetchone()
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
-            
-            # Insert new meeting
-            insert_query = """
-                INSERT INTO meetings (title, description, user_id, duration, status, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, NOW(), NOW())
-                RETURNING *
-            """
-            
-            cur.execute(insert_query, (
-                data['title'],
-                data.get('description', ''),
-                data['user_id'],
-                data.get('duration', 0),
-                data.get('status', 'scheduled')
-            ))
-            
-            meeting = cur.fetchone()
-            conn.commit()
-            
-            # Convert to dict and handle datetime objects
-            meeting_dict = dict(meeting)
-            for key, value in meeting_dict.items():
-                if isinstance(value, datetime):
-                    meeting_dict[key] = value.isoformat()
-            
-            return jsonify(meeting_dict), 201
-            
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Insert new meeting; selecting from users makes the insert
+                # its own existence check (no row back means no such user)
+                insert_query = """
+                    INSERT INTO meetings (title, description, user_id, duration, status, created_at, updated_at)
+                    SELECT %s, %s, u.id, %s, %s, NOW(), NOW()
+                    FROM users u WHERE u.id = %s
+                    RETURNING *
+                """
+                
+                cur.execute(insert_query, (
+                    data['title'],
+                    data.get('description', ''),
+                    data.get('duration', 0),
+                    data.get('status', 'scheduled'),
+                    data['user_id']
+                ))
+                
+                meeting = cur.fetchone()
+                if not meeting:
+                    return jsonify({'error': 'User not found'}), 404
+                conn.commit()
+                
+                return jsonify(meeting), 201
+                
     except Exception as e:
         logging.error(f"Error creating meeting: {e}")
         return jsonify({'error': 'Failed to create meeting'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
 
 @meeting_bp.route('/meetings/<meeting_id>', methods=['PUT'])
 def update_meeting(meeting_id):
@@ -208,123 +344,88 @@ def update_meeting(meeting_id):
     try:
         data = request.get_json()
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Check if meeting exists
-            cur.execute("SELECT id FROM meetings WHERE id = %s", (meeting_id,))
-            meeting = cur.fetchone()
-            if not meeting:
-                return jsonify({'error': 'Meeting not found'}), 404
-            
-            # Build update query dynamically
-            update_fields = []
-            params = []
-            
-            allowed_fields = ['title', 'description', 'duration', 'status', 'transcript', 'summary']
-            for field in allowed_fields:
-                if field in data:
-                    update_fields.append(f"{field} = %s")
-                    params.append(data[field])
-            
-            if not update_fields:
-                return jsonify({'error': 'No valid fields to update'}), 400
-            
-            # Add updated_at
-            update_fields.append("updated_at = NOW()")
-            params.append(meeting_id)
-            
-            update_query = f"UPDATE meetings SET {', '.join(update_fields)} WHERE id = %s RETURNING *"
-            cur.execute(update_query, params)
-            
-            updated_meeting = cur.fetchone()
-            conn.commit()
-            
-            # Convert to dict and handle datetime objects
-            meeting_dict = dict(updated_meeting)
-            for key, value in meeting_dict.items():
-                if isinstance(value, datetime):
-                    meeting_dict[key] = value.isoformat()
-            
-            return jsonify(meeting_dict)
-            
+        # Build update query dynamically
+        update_fields = []
+        params = []
+        
+        allowed_fields = ['title', 'description', 'duration', 'status', 'transcript', 'summary']
+        for field in allowed_fields:
+            if field in data:
+                update_fields.append(f"{field} = %s")
+                params.append(data[field])
+        
+        if not update_fields:
+            return jsonify({'error': 'No valid fields to update'}), 400
+        
+        # Add updated_at
+        update_fields.append("updated_at = NOW()")
+        params.append(meeting_id)
+        
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # RETURNING doubles as the existence check
+                update_query = f"UPDATE meetings SET {', '.join(update_fields)} WHERE id = %s RETURNING *"
+                cur.execute(update_query, params)
+                
+                updated_meeting = cur.fetchone()
+                if not updated_meeting:
+                    return jsonify({'error': 'Meeting not found'}), 404
+                conn.commit()
+                
+                return jsonify(updated_meeting)
+                
     except Exception as e:
         logging.error(f"Error updating meeting: {e}")
         return jsonify({'error': 'Failed to update meeting'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
 
 @meeting_bp.route('/meetings/<meeting_id>', methods=['DELETE'])
 def delete_meeting(meeting_id):
     """Delete a meeting and its associated tasks"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor() as cur:
-            # Check if meeting exists
-            cur.execute("SELECT id FROM meetings WHERE id = %s", (meeting_id,))
-            meeting = cur.fetchone()
-            if not meeting:
-                return jsonify({'error': 'Meeting not found'}), 404
-            
-            # Delete associated tasks first
-            cur.execute("DELETE FROM tasks WHERE meeting_id = %s", (meeting_id,))
-            
-            # Delete meeting
-            cur.execute("DELETE FROM meetings WHERE id = %s", (meeting_id,))
-            conn.commit()
-            
-            return jsonify({'message': 'Meeting and associated tasks deleted successfully'})
-            
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor() as cur:
+                # Delete the tasks explicitly: redundant once tasks.meeting_id
+                # is ON DELETE CASCADE, but databases not yet migrated by
+                # migrate_tasks_table.py still have a restricting foreign key
+                cur.execute("DELETE FROM tasks WHERE meeting_id = %s", (meeting_id,))
+                cur.execute("DELETE FROM meetings WHERE id = %s", (meeting_id,))
+                if cur.rowcount == 0:
+                    return jsonify({'error': 'Meeting not found'}), 404
+                conn.commit()
+                
+                return jsonify({'message': 'Meeting and associated tasks deleted successfully'})
+                
     except Exception as e:
         logging.error(f"Error deleting meeting: {e}")
         return jsonify({'error': 'Failed to delete meeting'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
 
 @meeting_bp.route('/meetings/user/<user_id>/stats', methods=['GET'])
 def get_meeting_stats(user_id):
     """Get meeting statistics for a user"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-            
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # Check if user exists
-            cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
-            user = cur.fetchone()
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
-            
-            # Get comprehensive statistics
-            stats_query = """
-                SELECT 
-                    COUNT(*) as total_meetings,
-                    COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_meetings,
-                    COUNT(CASE WHEN status = 'scheduled' THEN 1 END) as scheduled_meetings,
-                    COUNT(CASE WHEN status = 'in_progress' THEN 1 END) as in_progress_meetings,
-                    COUNT(CASE WHEN status = 'cancelled' THEN 1 END) as cancelled_meetings,
-                    AVG(duration) as avg_duration,
-                    SUM(duration) as total_duration,
-                    COUNT(CASE WHEN created_at >= NOW() - INTERVAL '30 days' THEN 1 END) as meetings_last_30_days,
-                    COUNT(CASE WHEN created_at >= NOW() - INTERVAL '7 days' THEN 1 END) as meetings_last_7_days
-                FROM meetings WHERE user_id = %s
-            """
-            cur.execute(stats_query, (user_id,))
-            stats = cur.fetchone()
-            
-            return jsonify(dict(stats))
-            
+        with db_conn() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+                
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Check if user exists
+                cur.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+                user = cur.fetchone()
+                if not user:
+                    return jsonify({'error': 'User not found'}), 404
+                
+                # Get comprehensive statistics
+                execute_prepared(cur, 'user_meeting_stats', MEETING_STATS_SQL, (user_id,))
+                stats = cur.fetchone()
+                
+                return jsonify(dict(stats))
+                
     except Exception as e:
         logging.error(f"Error fetching meeting stats: {e}")
-        return jsonify({'error': 'Failed to fetch meeting statistics'}), 500
-    finally:
-        if 'conn' in locals():
-            return_db_connection(conn)
\ No newline at end of file
+        return jsonify({'error': 'Failed to fetch meeting statistics'}), 500
\ No newline at end of file
@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 import requests
+from sqlalchemy import func
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
@@ -9,77 +14,156 @@ from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 import json
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+from models import db, Task, User, TaskPriority, TaskStatus
 
 load_dotenv()
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        DATABASE_URL = os.getenv('DATABASE_URL')
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    except Exception as e:
-        logging.error(f"Database connection error: {e}")
-        return None
-
 notify_bp = Blueprint('notify', __name__)
 
-def send_email_notification(user_email, subject, message, task=None):
-    """Send email notification using SendGrid"""
+# Keep-alive session shared by all SendGrid calls, so bulk notify runs reuse
+# pooled TLS connections
+_sendgrid_session = requests.Session()
+_sendgrid_session.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    # Only failed connections are retried: /v3/mail/send is not idempotent,
+    # so retrying a 5xx or read timeout could send a whole batch twice
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=False,
+        other=0,
+        backoff_factor=0.5
+    )
+))
+
+# Runs the SendGrid call alongside the Calendar insert; both are pure network waits
+_notify_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='notify')
+
+# SendGrid accepts at most this many personalizations per /v3/mail/send request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+OVERDUE_TASK_MESSAGE = """
+<h2>Overdue Task Alert</h2>
+<p><strong>Task:</strong> -task_name-</p>
+<p><strong>Was due:</strong> -task_due-</p>
+<p><strong>Priority:</strong> -task_priority-</p>
+<p>Please update the status or deadline for this task.</p>
+"""
+
+REMINDER_TASK_MESSAGE = """
+<h2>Task Reminder</h2>
+<p><strong>Task:</strong> -task_name-</p>
+<p><strong>Owner:</strong> -task_owner-</p>
+<p><strong>Deadline:</strong> -task_due-</p>
+<p><strong>Priority:</strong> -task_priority-</p>
+<p><strong>Status:</strong> -task_status-</p>
+"""
+
+COMPLETED_TASK_MESSAGE = """
+<h2>Task Completed</h2>
+<p><strong>Task:</strong> -task_name-</p>
+<p><strong>Completed by:</strong> -task_owner-</p>
+<p><strong>Completed at:</strong> -task_completed_at-</p>
+<p>Great job on completing this task!</p>
+"""
+
+# notify_task types: subject prefix and body
+TASK_NOTIFICATIONS = {
+    'reminder': ('Task Reminder', REMINDER_TASK_MESSAGE),
+    'overdue': ('Overdue Task', OVERDUE_TASK_MESSAGE),
+    'completed': ('Task Completed', COMPLETED_TASK_MESSAGE)
+}
+
+# Only the columns the notification emails use, so no full Task objects are hydrated
+NOTIFY_TASK_COLUMNS = (Task.id, Task.name, Task.owner, Task.deadline, Task.priority, Task.status, Task.completed_at)
+
+UPCOMING_TASK_MESSAGE = """
+<h2>Upcoming Task Reminder</h2>
+<p><strong>Task:</strong> -task_name-</p>
+<p><strong>Due:</strong> -task_due-</p>
+<p><strong>Days remaining:</strong> -days_remaining-</p>
+<p><strong>Priority:</strong> -task_priority-</p>
+<p>Please make sure to complete this task on time.</p>
+"""
+
+# Display labels, worked out once instead of .value.title() per task
+PRIORITY_LABELS = {priority: priority.value.title() for priority in TaskPriority}
+STATUS_LABELS = {status: status.value.title() for status in TaskStatus}
+
+def task_substitutions(task):
+    """SendGrid substitution values describing a task (a Task or a NOTIFY_TASK_COLUMNS row)"""
+    return {
+        'task_name': task.name,
+        'task_owner': task.owner or 'Unassigned',
+        'task_deadline': task.deadline.strftime('%Y-%m-%d') if task.deadline else 'No deadline',
+        'task_due': task.deadline.strftime('%Y-%m-%d %H:%M') if task.deadline else 'No deadline',
+        'task_priority': PRIORITY_LABELS.get(task.priority, 'Medium'),
+        'task_status': STATUS_LABELS.get(task.status, 'Pending'),
+        'task_completed_at': task.completed_at.strftime('%Y-%m-%d %H:%M') if task.completed_at else 'Unknown'
+    }
+
+def send_email_batch(personalizations, message):
+    """Send one email per personalization using SendGrid, batching the requests.
+
+    message is the shared HTML body; each personalization supplies its own
+    recipient, subject and substitutions for the -tag- placeholders in it.
+    Returns the number of personalizations SendGrid accepted.
+    """
     try:
         sendgrid_api_key = os.getenv('SENDGRID_API_KEY')
         if not sendgrid_api_key:
             logging.warning("SendGrid API key not configured")
-            return False
+            return 0
         
         headers = {
             'Authorization': f'Bearer {sendgrid_api_key}',
             'Content-Type': 'application/json'
         }
+        from_email = {'email': os.getenv('FROM_EMAIL', 'noreply@meetingai.com')}
+        
+        accepted = 0
+        for start in range(0, len(personalizations), SENDGRID_MAX_PERSONALIZATIONS):
+            batch = personalizations[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            response = _sendgrid_session.post(
+                'https://api.sendgrid.com/v3/mail/send',
+                headers=headers,
+                json={
+                    'personalizations': batch,
+                    'from': from_email,
+                    'content': [{
+                        'type': 'text/html',
+                        'value': message
+                    }]
+                },
+                timeout=30
+            )
+            
+            if response.status_code == 202:
+                accepted += len(batch)
+            else:
+                logging.error(f"SendGrid error: {response.status_code} - {response.text}")
         
-        # Prepare email data
-        email_data = {
-            'personalizations': [{
-                'to': [{'email': user_email}],
-                'subject': subject
-            }],
-            'from': {'email': os.getenv('FROM_EMAIL', 'noreply@meetingai.com')},
-            'content': [{
-                'type': 'text/html',
-                'value': message
-            }]
-        }
-        
-        # Add task details if provided
-        if task:
-            email_data['personalizations'][0]['substitutions'] = {
-                'task_name': task.name,
-                'task_owner': task.owner or 'Unassigned',
-                'task_deadline': task.deadline.strftime('%Y-%m-%d') if task.deadline else 'No deadline',
-                'task_priority': task.priority.value.title() if task.priority else 'Medium',
-                'task_status': task.status.value.title() if task.status else 'Pending'
-            }
-        
-        response = requests.post(
-            'https://api.sendgrid.com/v3/mail/send',
-            headers=headers,
-            json=email_data,
-            timeout=30
-        )
-        
-        if response.status_code == 202:
-            logging.info(f"Email sent successfully to {user_email}")
-            return True
-        else:
-            logging.error(f"SendGrid error: {response.status_code} - {response.text}")
-            return False
+        logging.info(f"Sent {accepted} of {len(personalizations)} emails")
+        return accepted
             
     except Exception as e:
         logging.error(f"Email notification error: {str(e)}")
-        return False
+        return 0
+
+def send_email_notification(user_email, subject, message, task=None):
+    """Send email notification using SendGrid"""
+    personalization = {
+        'to': [{'email': user_email}],
+        'subject': subject
+    }
+    
+    # Add task details if provided
+    if task:
+        personalization['substitutions'] = task_substitutions(task)
+    
+    return send_email_batch([personalization], message) == 1
 
 def create_calendar_event(task, user_email):
     """Create Google Calendar event for a task"""
@@ -124,6 +208,18 @@ def create_calendar_event(task, user_email):
         logging.error(f"Calendar event creation error: {str(e)}")
         return False
 
+@lru_cache(maxsize=None)
+def _build_calendar_service(credentials_file):
+    """Build the Calendar service once per process for a service account file"""
+    from google.oauth2 import service_account
+    
+    credentials = service_account.Credentials.from_service_account_file(
+        credentials_file,
+        scopes=['https://www.googleapis.com/auth/calendar']
+    )
+    # Use the discovery document bundled with the client instead of fetching it over HTTP
+    return build('calendar', 'v3', credentials=credentials, cache_discovery=False, static_discovery=True)
+
 def get_calendar_service(user_email):
     """Get Google Calendar service for user (simplified - in real app, store user tokens)"""
     try:
@@ -134,75 +230,50 @@ def get_calendar_service(user_email):
             logging.warning("Google credentials not configured")
             return None
         
-        # Load service account credentials
-        from google.oauth2 import service_account
-        
-        credentials = service_account.Credentials.from_service_account_file(
-            credentials_file,
-            scopes=['https://www.googleapis.com/auth/calendar']
-        )
-        
-        service = build('calendar', 'v3', credentials=credentials)
-        return service
+        # Cached per credentials file; failures raise and so are not cached
+        return _build_calendar_service(credentials_file)
         
     except Exception as e:
         logging.error(f"Calendar service error: {str(e)}")
         return None
 
+def _user_email(user_id):
+    """A user's email, or None if there is no such user"""
+    return db.session.query(User.email).filter_by(id=user_id).scalar()
+
 @notify_bp.route('/notify/task/<task_id>', methods=['POST'])
 def notify_task(task_id):
     """Send notification for a specific task"""
     try:
-        task = Task.query.get(task_id)
-        if not task:
+        # The task and its owner's email in one round trip
+        row = db.session.query(Task, User.email).outerjoin(
+            User, User.id == Task.user_id
+        ).filter(Task.id == task_id).first()
+        if not row:
             return jsonify({'error': 'Task not found'}), 404
         
-        user = User.query.get(task.user_id)
-        if not user:
+        task, user_email = row
+        if not user_email:
             return jsonify({'error': 'User not found'}), 404
         
         # Get notification type from request
         notification_type = request.json.get('type', 'reminder') if request.is_json else 'reminder'
         
         # Prepare notification message
-        if notification_type == 'reminder':
-            subject = f"Task Reminder: {task.name}"
-            message = f"""
-            <h2>Task Reminder</h2>
-            <p><strong>Task:</strong> {task.name}</p>
-            <p><strong>Owner:</strong> {task.owner or 'Unassigned'}</p>
-            <p><strong>Deadline:</strong> {task.deadline.strftime('%Y-%m-%d %H:%M') if task.deadline else 'No deadline'}</p>
-            <p><strong>Priority:</strong> {task.priority.value.title() if task.priority else 'Medium'}</p>
-            <p><strong>Status:</strong> {task.status.value.title() if task.status else 'Pending'}</p>
-            """
-        elif notification_type == 'overdue':
-            subject = f"Overdue Task: {task.name}"
-            message = f"""
-            <h2>Overdue Task Alert</h2>
-            <p><strong>Task:</strong> {task.name}</p>
-            <p><strong>Was due:</strong> {task.deadline.strftime('%Y-%m-%d %H:%M') if task.deadline else 'No deadline'}</p>
-            <p><strong>Priority:</strong> {task.priority.value.title() if task.priority else 'Medium'}</p>
-            <p>Please update the status or deadline for this task.</p>
-            """
-        elif notification_type == 'completed':
-            subject = f"Task Completed: {task.name}"
-            message = f"""
-            <h2>Task Completed</h2>
-            <p><strong>Task:</strong> {task.name}</p>
-            <p><strong>Completed by:</strong> {task.owner or 'Unassigned'}</p>
-            <p><strong>Completed at:</strong> {task.completed_at.strftime('%Y-%m-%d %H:%M') if task.completed_at else 'Unknown'}</p>
-            <p>Great job on completing this task!</p>
-            """
-        else:
+        if notification_type not in TASK_NOTIFICATIONS:
             return jsonify({'error': 'Invalid notification type'}), 400
+        subject_prefix, message = TASK_NOTIFICATIONS[notification_type]
+        subject = f"{subject_prefix}: {task.name}"
         
-        # Send email notification
-        email_sent = send_email_notification(user.email, subject, message, task)
+        # Send email notification in the background while the calendar event is created
+        email_future = _notify_executor.submit(send_email_notification, user_email, subject, message, task)
         
         # Create calendar event if task has deadline
         calendar_created = False
         if task.deadline:
-            calendar_created = create_calendar_event(task, user.email)
+            calendar_created = create_calendar_event(task, user_email)
+        
+        email_sent = email_future.result()
         
         return jsonify({
             'message': 'Notification sent successfully',
@@ -220,38 +291,30 @@ def notify_task(task_id):
 def notify_overdue_tasks(user_id):
     """Send notifications for all overdue tasks for a user"""
     try:
-        user = User.query.get(user_id)
-        if not user:
+        user_email = _user_email(user_id)
+        if not user_email:
             return jsonify({'error': 'User not found'}), 404
         
         # Get overdue tasks
-        overdue_tasks = Task.query.filter(
+        overdue_tasks = db.session.query(*NOTIFY_TASK_COLUMNS).filter(
             Task.user_id == user_id,
             Task.deadline < datetime.utcnow(),
-            Task.status != 'completed'
+            db.cast(Task.status, db.Text).notin_(('completed', 'COMPLETED'))
         ).all()
         
         if not overdue_tasks:
             return jsonify({'message': 'No overdue tasks found'})
         
-        # Send notifications for each overdue task
-        notifications_sent = 0
-        for task in overdue_tasks:
-            try:
-                subject = f"Overdue Task: {task.name}"
-                message = f"""
-                <h2>Overdue Task Alert</h2>
-                <p><strong>Task:</strong> {task.name}</p>
-                <p><strong>Was due:</strong> {task.deadline.strftime('%Y-%m-%d %H:%M') if task.deadline else 'No deadline'}</p>
-                <p><strong>Priority:</strong> {task.priority.value.title() if task.priority else 'Medium'}</p>
-                <p>Please update the status or deadline for this task.</p>
-                """
-                
-                if send_email_notification(user.email, subject, message, task):
-                    notifications_sent += 1
-                    
-            except Exception as e:
-                logging.error(f"Error sending notification for task {task.id}: {str(e)}")
+        # One personalization per task, all sent in a single SendGrid request
+        personalizations = [
+            {
+                'to': [{'email': user_email}],
+                'subject': f"Overdue Task: {task.name}",
+                'substitutions': task_substitutions(task)
+            }
+            for task in overdue_tasks
+        ]
+        notifications_sent = send_email_batch(personalizations, OVERDUE_TASK_MESSAGE)
         
         return jsonify({
             'message': f'Overdue task notifications sent',
@@ -267,42 +330,35 @@ def notify_overdue_tasks(user_id):
 def notify_upcoming_tasks(user_id):
     """Send notifications for upcoming tasks (next 7 days) for a user"""
     try:
-        user = User.query.get(user_id)
-        if not user:
+        user_email = _user_email(user_id)
+        if not user_email:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get upcoming tasks (next 7 days)
-        seven_days_from_now = datetime.utcnow() + timedelta(days=7)
-        upcoming_tasks = Task.query.filter(
+        # Get upcoming tasks (next 7 days), with the whole days left worked out in SQL
+        now = datetime.utcnow()
+        seven_days_from_now = now + timedelta(days=7)
+        days_until = db.cast(func.date_part('day', Task.deadline - now), db.Integer).label('days_until')
+        upcoming_tasks = db.session.query(*NOTIFY_TASK_COLUMNS, days_until).filter(
             Task.user_id == user_id,
-            Task.deadline >= datetime.utcnow(),
+            Task.deadline >= now,
             Task.deadline <= seven_days_from_now,
-            Task.status != 'completed'
+            db.cast(Task.status, db.Text).notin_(('completed', 'COMPLETED'))
         ).all()
         
         if not upcoming_tasks:
             return jsonify({'message': 'No upcoming tasks found'})
         
-        # Send notifications for upcoming tasks
-        notifications_sent = 0
+        # One personalization per task, all sent in a single SendGrid request
+        personalizations = []
         for task in upcoming_tasks:
-            try:
-                days_until_deadline = (task.deadline - datetime.utcnow()).days
-                subject = f"Upcoming Task: {task.name} (Due in {days_until_deadline} days)"
-                message = f"""
-                <h2>Upcoming Task Reminder</h2>
-                <p><strong>Task:</strong> {task.name}</p>
-                <p><strong>Due:</strong> {task.deadline.strftime('%Y-%m-%d %H:%M') if task.deadline else 'No deadline'}</p>
-                <p><strong>Days remaining:</strong> {days_until_deadline}</p>
-                <p><strong>Priority:</strong> {task.priority.value.title() if task.priority else 'Medium'}</p>
-                <p>Please make sure to complete this task on time.</p>
-                """
-                
-                if send_email_notification(user.email, subject, message, task):
-                    notifications_sent += 1
-                    
-            except Exception as e:
-                logging.error(f"Error sending notification for task {task.id}: {str(e)}")
+            substitutions = task_substitutions(task)
+            substitutions['days_remaining'] = str(task.days_until)
+            personalizations.append({
+                'to': [{'email': user_email}],
+                'subject': f"Upcoming Task: {task.name} (Due in {task.days_until} days)",
+                'substitutions': substitutions
+            })
+        notifications_sent = send_email_batch(personalizations, UPCOMING_TASK_MESSAGE)
         
         return jsonify({
             'message': f'Upcoming task notifications sent',
@@ -318,8 +374,8 @@ def notify_upcoming_tasks(user_id):
 def get_notification_settings(user_id):
     """Get notification settings for a user"""
     try:
-        user = User.query.get(user_id)
-        if not user:
+        user_email = _user_email(user_id)
+        if not user_email:
             return jsonify({'error': 'User not found'}), 404
         
         # In a real app, you'd have a separate settings table
@@ -343,8 +399,8 @@ def get_notification_settings(user_id):
 def update_notification_settings(user_id):
     """Update notification settings for a user"""
     try:
-        user = User.query.get(user_id)
-        if not user:
+        user_email = _user_email(user_id)
+        if not user_email:
             return jsonify({'error': 'User not found'}), 404
         
         data = request.get_json()
@@ -1,108 +0,0 @@
-from flask import Blueprint, request, jsonify
-import logging
-
-task_bp = Blueprint('task', __name__)
-
-@task_bp.route('/tasks/user/<user_id>', methods=['GET'])
-def get_user_tasks(user_id):
-    """Get all tasks for a user - Simple version"""
-    try:
-        # Return empty data for now to fix 500 errors
-        return jsonify({
-            'tasks': [],
-            'statistics': {
-                'total': 0,
-                'completed': 0,
-                'pending': 0,
-                'in_progress': 0,
-                'overdue': 0,
-                'decisions': 0,
-                'action_items': 0,
-                'unresolved': 0
-            },
-            'pagination': {
-                'page': 1,
-                'per_page': 20,
-                'total': 0,
-                'pages': 0,
-                'has_next': False,
-                'has_prev': False
-            }
-        })
-        
-    except Exception as e:
-        logging.error(f"Get user tasks error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks', methods=['POST'])
-def create_task():
-    """Create a new task - Simple version"""
-    try:
-        return jsonify({
-            'message': 'Task creation not implemented yet',
-            'task_id': 'temp-id'
-        })
-        
-    except Exception as e:
-        logging.error(f"Create task error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/<task_id>', methods=['GET'])
-def get_task(task_id):
-    """Get a specific task - Simple version"""
-    try:
-        return jsonify({'error': 'Task not found'}), 404
-        
-    except Exception as e:
-        logging.error(f"Get task error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/<task_id>', methods=['PUT'])
-def update_task(task_id):
-    """Update a task - Simple version"""
-    try:
-        return jsonify({'message': 'Task update not implemented yet'})
-        
-    except Exception as e:
-        logging.error(f"Update task error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/<task_id>', methods=['DELETE'])
-def delete_task(task_id):
-    """Delete a task - Simple version"""
-    try:
-        return jsonify({'message': 'Task deletion not implemented yet'})
-        
-    except Exception as e:
-        logging.error(f"Delete task error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/<task_id>/complete', methods=['POST'])
-def complete_task(task_id):
-    """Complete a task - Simple version"""
-    try:
-        return jsonify({'message': 'Task completion not implemented yet'})
-        
-    except Exception as e:
-        logging.error(f"Complete task error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/overdue/user/<user_id>', methods=['GET'])
-def get_overdue_tasks(user_id):
-    """Get overdue tasks for a user - Simple version"""
-    try:
-        return jsonify({'tasks': []})
-        
-    except Exception as e:
-        logging.error(f"Get overdue tasks error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
-
-@task_bp.route('/tasks/upcoming/user/<user_id>', methods=['GET'])
-def get_upcoming_tasks(user_id):
-    """Get upcoming tasks for a user - Simple version"""
-    try:
-        return jsonify({'tasks': []})
-        
-    except Exception as e:
-        logging.error(f"Get upcoming tasks error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
@@ -225,21 +225,20 @@ def get_user_stats(user_id):
                 if not user:
                     return jsonify({'error': 'User not found'}), 404
                 
-                # Get meeting count
-                cursor.execute("SELECT COUNT(*) as meeting_count FROM meetings WHERE user_id = %s", (user_id,))
-                meeting_count = cursor.fetchone()['meeting_count']
-                
-                # Get task count
-                cursor.execute("SELECT COUNT(*) as task_count FROM tasks WHERE user_id = %s", (user_id,))
-                task_count = cursor.fetchone()['task_count']
-                
-                # Get completed task count
-                cursor.execute("SELECT COUNT(*) as completed_tasks FROM tasks WHERE user_id = %s AND status = 'completed'", (user_id,))
-                completed_tasks = cursor.fetchone()['completed_tasks']
-                
-                # Get pending task count
-                cursor.execute("SELECT COUNT(*) as pending_tasks FROM tasks WHERE user_id = %s AND status = 'pending'", (user_id,))
-                pending_tasks = cursor.fetchone()['pending_tasks']
+                # Meeting and task counts in a single aggregate pass
+                cursor.execute("""
+                    SELECT
+                        (SELECT COUNT(*) FROM meetings WHERE user_id = %s) AS meeting_count,
+                        COUNT(*) AS task_count,
+                        COUNT(*) FILTER (WHERE status = 'completed') AS completed_tasks,
+                        COUNT(*) FILTER (WHERE status = 'pending') AS pending_tasks
+                    FROM tasks WHERE user_id = %s
+                """, (user_id, user_id))
+                counts = cursor.fetchone()
+                meeting_count = counts['meeting_count']
+                task_count = counts['task_count']
+                completed_tasks = counts['completed_tasks']
+                pending_tasks = counts['pending_tasks']
                 
                 return jsonify({
                     'user_id': user_id,
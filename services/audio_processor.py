@@ -7,25 +7,43 @@ import os
 import logging
 import asyncio
 import json
-import base64
+import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import requests
+import aiohttp
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import google.generativeai as genai
 from supabase import create_client, Client
 
 load_dotenv()
 
+# Read once at import; these do not change while the process runs
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
+RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST', 'speech-to-text-ai.p.rapidapi.com')
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Fallbacks for pulling a JSON object/array out of a chatty Gemini reply
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
 class AudioProcessorService:
     def __init__(self):
-        self.rapidapi_key = os.getenv('RAPIDAPI_KEY')
-        self.rapidapi_host = 'speech-to-text-ai.p.rapidapi.com'
-        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_SERVICE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        self.rapidapi_key = RAPIDAPI_KEY
+        self.rapidapi_host = RAPIDAPI_HOST
+        self._rapidapi_url = f"https://{self.rapidapi_host}/transcribe"
+        self._rapidapi_headers = {
+            "x-rapidapi-key": self.rapidapi_key,
+            "x-rapidapi-host": self.rapidapi_host
+        }
+        self.gemini_api_key = GEMINI_API_KEY
+        self.supabase_url = SUPABASE_URL
+        self.supabase_key = SUPABASE_KEY
         
         # Initialize Gemini AI
         if self.gemini_api_key:
@@ -37,6 +55,23 @@ class AudioProcessorService:
             self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
         else:
             self.supabase = None
+        
+        # aiohttp session, created lazily because a session is bound to the
+        # event loop it was created on (the WebSocket loop, or a per-upload loop)
+        self._http_session = None
+        self._http_session_loop = None
+    
+    async def get_http_session(self) -> aiohttp.ClientSession:
+        """Get a keep-alive HTTP session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._http_session
+        if session is None or session.closed or self._http_session_loop is not loop:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60)
+            )
+            self._http_session = session
+            self._http_session_loop = loop
+        return session
     
     def get_db_connection(self):
         """Get database connection"""
@@ -45,7 +80,6 @@ class AudioProcessorService:
             return app_get_db_connection()
         except ImportError:
             try:
-                DATABASE_URL = os.getenv('DATABASE_URL')
                 conn = psycopg2.connect(DATABASE_URL)
                 return conn
             except Exception as e:
@@ -97,49 +131,41 @@ class AudioProcessorService:
                 logging.error("RapidAPI key not configured - transcription requires RapidAPI")
                 return None
             
-            # Download audio file
-            response = requests.get(audio_url, timeout=30)
-            if response.status_code != 200:
-                logging.error(f"Failed to download audio: {response.status_code}")
-                return None
-            
-            audio_data = response.content
-            
-            # Convert audio to base64 for RapidAPI
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            session = await self.get_http_session()
             
-            # Prepare RapidAPI request
-            url = f"https://{self.rapidapi_host}/transcribe"
+            # Download audio file
+            async with session.get(audio_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200:
+                    logging.error(f"Failed to download audio: {response.status}")
+                    return None
+                audio_data = await response.read()
             
             # For file upload, we need to use multipart/form-data
-            files = {
-                'file': ('audio.webm', audio_data, 'audio/webm')
-            }
-            
-            headers = {
-                "x-rapidapi-key": self.rapidapi_key,
-                "x-rapidapi-host": self.rapidapi_host
-            }
+            form = aiohttp.FormData()
+            form.add_field('file', audio_data, filename='audio.webm', content_type='audio/webm')
             
             # Make request to RapidAPI
-            response = requests.post(url, files=files, headers=headers, timeout=60)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if 'transcript' in result:
-                    transcript = result['transcript'].strip()
-                    logging.info(f"RapidAPI transcription completed: {len(transcript)} characters")
-                    return transcript
-                elif 'text' in result:
-                    transcript = result['text'].strip()
-                    logging.info(f"RapidAPI transcription completed: {len(transcript)} characters")
-                    return transcript
-                else:
-                    logging.error(f"Unexpected RapidAPI response format: {result}")
+            async with session.post(
+                self._rapidapi_url,
+                data=form,
+                headers=self._rapidapi_headers,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status != 200:
+                    logging.error(f"RapidAPI transcription failed: {response.status} - {await response.text()}")
                     return None
+                result = await response.json(content_type=None)
+            
+            if 'transcript' in result:
+                transcript = result['transcript'].strip()
+                logging.info(f"RapidAPI transcription completed: {len(transcript)} characters")
+                return transcript
+            elif 'text' in result:
+                transcript = result['text'].strip()
+                logging.info(f"RapidAPI transcription completed: {len(transcript)} characters")
+                return transcript
             else:
-                logging.error(f"RapidAPI transcription failed: {response.status_code} - {response.text}")
+                logging.error(f"Unexpected RapidAPI response format: {result}")
                 return None
                 
         except Exception as e:
@@ -236,8 +262,7 @@ class AudioProcessorService:
                 logging.error("Failed to parse Gemini response as JSON")
                 # Try to extract JSON from response
                 try:
-                    import re
-                    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+                    json_match = _JSON_OBJECT_RE.search(response.text)
                     if json_match:
                         timeline_data = json.loads(json_match.group())
                         return timeline_data
@@ -336,8 +361,7 @@ class AudioProcessorService:
                 logging.error("Failed to parse tasks as JSON")
                 # Try to extract JSON from response
                 try:
-                    import re
-                    json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+                    json_match = _JSON_ARRAY_RE.search(response.text)
                     if json_match:
                         tasks = json.loads(json_match.group())
                         return tasks if isinstance(tasks, list) else []
@@ -358,32 +382,35 @@ class AudioProcessorService:
                 return False
             
             try:
+                # One timestamp for the whole batch
+                now = datetime.now()
+                rows = [(
+                    task.get('name', ''),
+                    task.get('description', ''),
+                    task.get('priority', 'medium'),
+                    task.get('status', 'pending'),
+                    task.get('category', 'general'),
+                    task.get('assignee', 'Unassigned'),
+                    user_id,
+                    meeting_id,
+                    task.get('due_date'),
+                    now,
+                    now,
+                    task.get('effort', 1),
+                    json.dumps(task.get('dependencies', [])),
+                    json.dumps(task.get('tags', [])),
+                    task.get('context', '')
+                ) for task in tasks]
+                
                 with conn.cursor() as cursor:
-                    for task in tasks:
-                        # Insert task with enhanced fields
-                        cursor.execute("""
-                            INSERT INTO tasks (
-                                name, description, priority, status, category, 
-                                owner, user_id, meeting_id, deadline, created_at, updated_at,
-                                effort, dependencies, tags, context
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            task.get('name', ''),
-                            task.get('description', ''),
-                            task.get('priority', 'medium'),
-                            task.get('status', 'pending'),
-                            task.get('category', 'general'),
-                            task.get('assignee', 'Unassigned'),
-                            user_id,
-                            meeting_id,
-                            task.get('due_date'),
-                            datetime.now(),
-                            datetime.now(),
-                            task.get('effort', 1),
-                            json.dumps(task.get('dependencies', [])),
-                            json.dumps(task.get('tags', [])),
-                            task.get('context', '')
-                        ))
+                    # Insert all tasks with enhanced fields in a single round trip
+                    execute_values(cursor, """
+                        INSERT INTO tasks (
+                            name, description, priority, status, category, 
+                            owner, user_id, meeting_id, deadline, created_at, updated_at,
+                            effort, dependencies, tags, context
+                        ) VALUES %s
+                    """, rows, page_size=500)
                 
                 conn.commit()
                 logging.info(f"Saved {len(tasks)} tasks to database with enhanced fields")
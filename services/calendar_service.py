@@ -14,6 +14,28 @@ from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+# How far out tasks without a due date are scheduled, by priority (default 7 days)
+AUTO_SCHEDULE_DELAYS = {
+    'high': timedelta(days=1),
+    'medium': timedelta(days=3),
+}
+
+# Identical for every event, so built once rather than per task
+EVENT_REMINDERS = {
+    'useDefault': False,
+    'overrides': [
+        {'method': 'email', 'minutes': 24 * 60},  # 1 day before
+        {'method': 'popup', 'minutes': 60},       # 1 hour before
+    ],
+}
+
+# Google Calendar color ID by task priority
+PRIORITY_COLOR_IDS = {
+    'high': '11',    # Red
+    'medium': '5',   # Yellow
+    'low': '10',     # Green
+}
+
 class CalendarService:
     def __init__(self):
         self.credentials = None
@@ -55,7 +77,9 @@ class CalendarService:
             self.credentials = flow.credentials
             
             # Build the service
-            self.service = build('calendar', 'v3', credentials=self.credentials)
+            # Bundled discovery document, so building doesn't fetch it over HTTP
+            self.service = build('calendar', 'v3', credentials=self.credentials,
+                                 cache_discovery=False, static_discovery=True)
             
             return True
             
@@ -97,13 +121,7 @@ class CalendarService:
                     'dateTime': end_time.isoformat(),
                     'timeZone': 'UTC',
                 },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},  # 1 day before
-                        {'method': 'popup', 'minutes': 60},       # 1 hour before
-                    ],
-                },
+                'reminders': EVENT_REMINDERS,
                 'colorId': self._get_color_id(priority),
             }
             
@@ -163,13 +181,7 @@ class CalendarService:
                     'timeZone': 'UTC',
                 },
                 'recurrence': [f'RRULE:FREQ={recurrence.upper()};COUNT=10'],  # 10 occurrences
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},
-                        {'method': 'popup', 'minutes': 60},
-                    ],
-                },
+                'reminders': EVENT_REMINDERS,
                 'colorId': self._get_color_id(priority),
             }
             
@@ -240,12 +252,7 @@ class CalendarService:
     
     def _get_color_id(self, priority: str) -> str:
         """Get Google Calendar color ID based on priority"""
-        color_map = {
-            'high': '11',    # Red
-            'medium': '5',   # Yellow
-            'low': '10',     # Green
-        }
-        return color_map.get(priority.lower(), '5')  # Default to yellow
+        return PRIORITY_COLOR_IDS.get(priority.lower(), '5')  # Default to yellow
     
     def schedule_tasks(self, tasks: List[Dict], user_id: str) -> Dict:
         """Schedule multiple tasks in calendar with enhanced scheduling logic using Gemini AI intelligence"""
@@ -258,6 +265,11 @@ class CalendarService:
                 'skipped_count': 0
             }
             
+            # Bound once for the whole batch rather than per task
+            now = datetime.now()
+            auto_schedule_delay = AUTO_SCHEDULE_DELAYS.get
+            default_delay = timedelta(days=7)
+            
             for task in tasks:
                 try:
                     task_name = task.get('name', 'Untitled Task')
@@ -271,12 +283,7 @@ class CalendarService:
                     due_date = task.get('due_date')
                     if not due_date:
                         # Auto-schedule based on priority and effort
-                        if priority == 'high':
-                            due_date = (datetime.now() + timedelta(days=1)).isoformat()
-                        elif priority == 'medium':
-                            due_date = (datetime.now() + timedelta(days=3)).isoformat()
-                        else:
-                            due_date = (datetime.now() + timedelta(days=7)).isoformat()
+                        due_date = (now + auto_schedule_delay(priority, default_delay)).isoformat()
                     
                     # Create enhanced calendar event
                     event_id = self._create_enhanced_event(task, user_id, due_date)
@@ -372,13 +379,7 @@ class CalendarService:
                     'dateTime': end_time.isoformat(),
                     'timeZone': 'UTC',
                 },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},  # 1 day before
-                        {'method': 'popup', 'minutes': 60},       # 1 hour before
-                    ],
-                },
+                'reminders': EVENT_REMINDERS,
                 'colorId': self._get_color_id(priority),
                 'visibility': 'private',
                 'transparency': 'opaque',
@@ -1,7 +1,10 @@
 import pytest
 import json
+import asyncio
+import struct
+from datetime import datetime
 from app import app, db
-from models import User, Meeting, Task
+from models import User, Meeting, Task, TaskCategory
 
 @pytest.fixture
 def client():
@@ -42,6 +45,23 @@ def test_meeting(test_user):
     db.session.commit()
     return meeting
 
+@pytest.fixture
+def test_meetings(test_user):
+    """Create three meetings for the test user, newest last"""
+    meetings = [
+        Meeting(
+            id=f'test-meeting-{index}',
+            title=f'Test Meeting {index}',
+            user_id=test_user.id,
+            status='transcribed',
+            created_at=datetime(2024, 1, index + 1, 9, 0)
+        )
+        for index in range(3)
+    ]
+    db.session.add_all(meetings)
+    db.session.commit()
+    return meetings
+
 def test_health_check(client):
     """Test health check endpoint"""
     response = client.get('/api/health')
@@ -104,3 +124,242 @@ def test_notification_settings(client, test_user):
     assert response.status_code == 200
     data = json.loads(response.data)
     assert 'settings' in data
+
+def test_get_meeting_etag_revalidation(client, test_user, test_meeting):
+    """Test get meeting returns an ETag and answers If-None-Match with 304"""
+    response = client.get(f'/api/meeting/{test_meeting.id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag
+    
+    response = client.get(f'/api/meeting/{test_meeting.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+def test_get_meeting_etag_changes_with_tasks(client, test_user, test_meeting):
+    """Test a stale ETag gets the full meeting once its tasks change"""
+    response = client.get(f'/api/meeting/{test_meeting.id}')
+    etag = response.headers['ETag']
+    
+    task = Task(
+        name='New Task',
+        category=TaskCategory.ACTION_ITEM,
+        meeting_id=test_meeting.id,
+        user_id=test_user.id
+    )
+    db.session.add(task)
+    db.session.commit()
+    
+    response = client.get(f'/api/meeting/{test_meeting.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    data = json.loads(response.data)
+    assert [t['id'] for t in data['tasks']] == [task.id]
+
+def test_get_user_meetings_cursor_pagination(client, test_user, test_meetings):
+    """Test keyset pagination walks every meeting once, newest first"""
+    response = client.get(f'/api/meetings/user/{test_user.id}?per_page=2')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [m['id'] for m in data['meetings']] == ['test-meeting-2', 'test-meeting-1']
+    assert data['pagination']['has_next'] is True
+    next_cursor = data['pagination']['next_cursor']
+    assert next_cursor
+    
+    response = client.get(f'/api/meetings/user/{test_user.id}?per_page=2&cursor={next_cursor}')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [m['id'] for m in data['meetings']] == ['test-meeting-0']
+    assert data['pagination']['has_next'] is False
+    assert data['pagination']['next_cursor'] is None
+
+def test_get_user_meetings_invalid_cursor(client, test_user):
+    """Test a malformed cursor is rejected"""
+    response = client.get(f'/api/meetings/user/{test_user.id}?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+def test_get_user_meetings_total(client, test_user, test_meetings):
+    """Test the default page carries the total and task counts"""
+    response = client.get(f'/api/meetings/user/{test_user.id}?per_page=2')
+    data = json.loads(response.data)
+    assert data['pagination']['total'] == 3
+    assert data['pagination']['pages'] == 2
+    assert data['meetings'][0]['task_counts'] == {'decisions': 0, 'action_items': 0, 'unresolved': 0}
+    assert '_total' not in data['meetings'][0]
+
+def test_get_user_meetings_without_total(client, test_user, test_meetings):
+    """Test include_total=false pages without counting every meeting"""
+    response = client.get(f'/api/meetings/user/{test_user.id}?per_page=2&page=2&include_total=false')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [m['id'] for m in data['meetings']] == ['test-meeting-0']
+    assert 'total' not in data['pagination']
+    assert data['pagination']['has_prev'] is True
+    assert data['pagination']['has_next'] is False
+
+def test_stream_user_meetings(client, test_user, test_meetings):
+    """Test the NDJSON stream sends one meeting per line"""
+    response = client.get(f'/api/meetings/user/{test_user.id}/stream')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.data.decode().splitlines()
+    assert sorted(json.loads(line)['id'] for line in lines) == [m.id for m in test_meetings]
+
+def test_stream_user_meetings_unknown_user(client):
+    """Test the NDJSON stream 404s for an unknown user"""
+    response = client.get('/api/meetings/user/no-such-user/stream')
+    assert response.status_code == 404
+
+def test_get_meeting_stats(client, test_user, test_meetings):
+    """Test meeting statistics endpoint"""
+    response = client.get(f'/api/meetings/user/{test_user.id}/stats')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['total_meetings'] == 3
+
+def test_get_user_tasks_response_shape(client, test_user, test_meeting):
+    """Test the tasks, pagination and stats spliced from PostgreSQL JSON"""
+    db.session.add_all([
+        Task(name=name, category=TaskCategory.ACTION_ITEM, meeting_id=test_meeting.id, user_id=test_user.id)
+        for name in ('First Task', 'Second Task')
+    ])
+    db.session.commit()
+    
+    response = client.get(f'/api/tasks/user/{test_user.id}?per_page=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    data = json.loads(response.data)
+    assert set(data) == {'tasks', 'pagination', 'stats'}
+    assert len(data['tasks']) == 1
+    assert data['pagination'] == {'page': 1, 'per_page': 1, 'total': 2, 'pages': 2}
+    assert data['stats'] == {'total': 2, 'pending': 2, 'completed': 0}
+
+def test_get_user_tasks_unknown_user(client):
+    """Test get user tasks 404s for an unknown user"""
+    response = client.get('/api/tasks/user/no-such-user')
+    assert response.status_code == 404
+
+def test_get_task(client, test_user, test_meeting):
+    """Test get task returns the row serialized by PostgreSQL"""
+    task = Task(name='Test Task', category=TaskCategory.ACTION_ITEM, meeting_id=test_meeting.id, user_id=test_user.id)
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+    
+    response = client.get(f'/api/tasks/{task_id}')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['id'] == task_id
+    assert data['name'] == 'Test Task'
+    
+    response = client.get('/api/tasks/no-such-task')
+    assert response.status_code == 404
+
+def test_task_stats(client, test_user):
+    """Test task statistics for a user with no tasks, and an unknown user"""
+    response = client.get(f'/api/tasks/user/{test_user.id}/stats')
+    assert response.status_code == 200
+    assert json.loads(response.data)['total_tasks'] == 0
+    
+    response = client.get('/api/tasks/user/no-such-user/stats')
+    assert response.status_code == 404
+
+def test_overdue_and_upcoming_tasks(client, test_user):
+    """Test the overdue and upcoming task lists"""
+    for kind in ('overdue', 'upcoming'):
+        response = client.get(f'/api/tasks/{kind}/user/{test_user.id}')
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'tasks': [], 'count': 0}
+        
+        response = client.get(f'/api/tasks/{kind}/user/no-such-user')
+        assert response.status_code == 404
+
+def test_create_tasks_from_extraction(client, test_user, test_meeting):
+    """Test extracted decisions, action items and questions are inserted together"""
+    from routes.extract import create_tasks_from_extraction
+    
+    rows = create_tasks_from_extraction(test_meeting.id, test_user.id, {
+        'decisions': [{'text': 'Ship on Friday', 'timestamp': '10:05', 'impact': 'high'}],
+        'action_items': [
+            {'text': 'Write release notes', 'owner': 'Sam', 'deadline': '2030-01-15', 'priority': 'medium'},
+            {'text': 'Tag the release', 'priority': 'unknown'}
+        ],
+        'unresolved_questions': [{'text': 'Who signs off?', 'context': 'End of meeting'}]
+    })
+    assert len(rows) == 4
+    
+    tasks = {task.name: task for task in Task.query.filter_by(meeting_id=test_meeting.id)}
+    assert set(tasks) == {'Ship on Friday', 'Write release notes', 'Tag the release', 'Who signs off?'}
+    assert tasks['Ship on Friday'].category == TaskCategory.DECISION
+    assert tasks['Ship on Friday'].completed_at is not None
+    assert tasks['Write release notes'].owner == 'Sam'
+    assert tasks['Write release notes'].deadline == datetime(2030, 1, 15)
+    assert tasks['Tag the release'].owner == 'TBD'
+    assert tasks['Who signs off?'].category == TaskCategory.UNRESOLVED
+    
+    response = client.get(f'/api/extract/{test_meeting.id}/status')
+    data = json.loads(response.data)
+    assert data['task_counts'] == {'decisions': 1, 'action_items': 2, 'unresolved': 1}
+    assert data['total_tasks'] == 4
+
+def test_create_tasks_from_empty_extraction(client, test_user, test_meeting):
+    """Test an extraction with nothing in it inserts no tasks"""
+    from routes.extract import create_tasks_from_extraction
+    
+    assert create_tasks_from_extraction(test_meeting.id, test_user.id, {}) == []
+    assert Task.query.filter_by(meeting_id=test_meeting.id).count() == 0
+
+class FakeWebSocket:
+    """Feeds messages to handle_websocket_connection and records its replies"""
+    remote_address = ('127.0.0.1', 0)
+    
+    def __init__(self, messages, expected_replies):
+        self.messages = messages
+        self.expected_replies = expected_replies
+        self.sent = []
+    
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+    
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+        # Keep the connection open until the queued chunks are transcribed
+        for _ in range(100):
+            if len(self.sent) >= self.expected_replies:
+                return
+            await asyncio.sleep(0.01)
+
+def test_split_audio_frame():
+    """Test binary audio frames with and without a metadata header"""
+    from routes.audio import _split_audio_frame
+    
+    meta = json.dumps({'userId': 'test-user-123', 'meetingId': 'test-meeting-123'}).encode()
+    frame = struct.pack('<I', len(meta)) + meta + b'audio' * 40
+    header, audio = _split_audio_frame(frame)
+    assert header == {'userId': 'test-user-123', 'meetingId': 'test-meeting-123'}
+    assert bytes(audio) == b'audio' * 40
+    
+    raw = b'\x1aE\xdf\xa3' + b'\x00' * 200
+    assert _split_audio_frame(raw) == (None, raw)
+
+def test_websocket_binary_audio_frames(monkeypatch):
+    """Test binary frames are transcribed once a meeting context is set, and rejected before"""
+    import routes.audio as audio
+    
+    async def fake_transcribe(self, audio_bytes):
+        return f'{len(audio_bytes)} bytes'
+    monkeypatch.setattr(audio.AudioProcessor, 'transcribe_audio', fake_transcribe)
+    
+    meta = json.dumps({'userId': 'test-user-123', 'meetingId': 'test-meeting-123'}).encode()
+    websocket = FakeWebSocket([
+        b'x' * 200,
+        struct.pack('<I', len(meta)) + meta + b'y' * 300,
+        b'z' * 400
+    ], expected_replies=3)
+    asyncio.run(audio.handle_websocket_connection(websocket, '/'))
+    
+    assert websocket.sent[0]['type'] == 'error'
+    transcripts = [message for message in websocket.sent if message['type'] == 'transcript']
+    assert [(m['text'], m['turn_order']) for m in transcripts] == [('300 bytes', 1), ('400 bytes', 2)]